@@ -2,6 +2,13 @@ import streamlit as st
 import pandas as pd
 import matplotlib.pyplot as plt
 
+import engine
+import metrics
+import routing
+import scenarios
+
+metrics.begin_rerun(__file__)
+
 # ------------------------------
 # 🎮 Game Configuration
 # ------------------------------
@@ -12,20 +19,13 @@ st.sidebar.header("Game Settings")
 years = st.sidebar.slider("Select Simulation Years", min_value=3, max_value=7, value=5)
 
 # Sustainability initiatives based on IPS2 Circular Economy Model
-initiatives = {
-    "Smart Waste Sensors": {"CO2 Reduction": 10, "Cost": 2, "Implementation Years": 2},
-    "AI Route Optimization": {"CO2 Reduction": 15, "Cost": 3, "Implementation Years": 3},
-    "Fleet Electrification": {"CO2 Reduction": 20, "Cost": 5, "Implementation Years": 4},
-    "Public Awareness Campaign": {"CO2 Reduction": 5, "Cost": 1, "Implementation Years": 1},
-    "IoT Data Analytics for Containers": {"CO2 Reduction": 7, "Cost": 1.5, "Implementation Years": 2},
-    "Automated Sorting System": {"CO2 Reduction": 12, "Cost": 3, "Implementation Years": 3},
-    "Green Hydrogen-Powered Trucks": {"CO2 Reduction": 25, "Cost": 6, "Implementation Years": 5},
-}
+scenario = routing.apply(scenarios.load("circular_economy"))  # Logistics impacts from the fleet model with GAME_ROUTING=1
+initiatives = scenario.initiatives
 
 # Initial settings
-starting_co2 = 100  # Initial CO2 level (percentage of baseline)
-co2_reduction_target = 30  # Target CO2 reduction percentage
-budget = 10  # Initial budget in $M
+starting_co2 = scenario.starting_level  # Initial CO2 level (percentage of baseline)
+co2_reduction_target = scenario.target  # Target CO2 reduction percentage
+budget = scenario.budget  # Initial budget in $M
 
 # Store game progress
 game_data = {
@@ -36,6 +36,8 @@ game_data = {
     "Remaining Budget": [],
 }
 
+metrics.lap("intro")
+
 # ------------------------------
 # 🏁 Game Loop
 # ------------------------------
@@ -47,9 +49,9 @@ for year in range(1, years + 1):
 
     selected_initiatives = st.multiselect(
         f"Select up to 3 initiatives for Year {year}",
-        list(initiatives.keys()),
+        scenario.names,
         default=[],
-        max_selections=3,
+        max_selections=scenario.max_selections,
     )
 
     if st.button(f"Confirm Choices for Year {year}"):
@@ -72,6 +74,8 @@ for year in range(1, years + 1):
 
     st.write("---")
 
+metrics.lap("year_loop")
+
 # ------------------------------
 # 📊 Results & Visualization
 # ------------------------------
@@ -80,8 +84,9 @@ if len(game_data["Year"]) > 0:
     df_results = pd.DataFrame(game_data)
 
     # Ensure cumulative CO2 reduction is tracked correctly
-    df_results["Cumulative_CO2_Reduction"] = df_results["CO2 Reduction"].cumsum()
-    df_results["Remaining_CO2"] = starting_co2 - df_results["Cumulative_CO2_Reduction"]
+    remaining_co2 = engine.levels(scenario, df_results["CO2 Reduction"])  # Additive or compounding, per scenario
+    df_results["Cumulative_CO2_Reduction"] = starting_co2 - remaining_co2
+    df_results["Remaining_CO2"] = remaining_co2
 
     st.header("📊 Game Summary")
     st.write(df_results)
@@ -119,3 +124,6 @@ if len(game_data["Year"]) > 0:
         st.success("🎉 Congratulations! You have optimized the circular economy recycling system! 🎉")
     elif budget <= 0:
         st.error("⚠️ Budget depleted! Try optimizing your strategy next time.")
+
+metrics.lap("results")
+metrics.end_rerun(st.session_state)
@@ -2,6 +2,12 @@ import streamlit as st
 import pandas as pd
 import matplotlib.pyplot as plt
 
+import metrics
+import routing
+import scenarios
+
+metrics.begin_rerun(__file__)
+
 # ------------------------------
 # 🎮 Game Configuration
 # ------------------------------
@@ -12,21 +18,13 @@ st.sidebar.header("Game Settings")
 years = st.sidebar.slider("Select Simulation Years", min_value=3, max_value=7, value=5)
 
 # Sustainability initiatives based on Servitisation & Green Supply Chain Management
-initiatives = {
-    "IoT-Enabled Smart Manufacturing": {"CO2 Reduction": 12, "Cost": 3, "Implementation Years": 3},
-    "AI-Optimized Logistics Routes": {"CO2 Reduction": 10, "Cost": 2, "Implementation Years": 2},
-    "Fleet Electrification": {"CO2 Reduction": 15, "Cost": 5, "Implementation Years": 4},
-    "Public Awareness & Green Branding": {"CO2 Reduction": 5, "Cost": 1, "Implementation Years": 1},
-    "Green Procurement (Sustainable Suppliers)": {"CO2 Reduction": 8, "Cost": 2, "Implementation Years": 2},
-    "Automated Sorting & Recycling System": {"CO2 Reduction": 15, "Cost": 4, "Implementation Years": 3},
-    "Reverse Logistics for Parts Recovery": {"CO2 Reduction": 10, "Cost": 2.5, "Implementation Years": 3},
-    "Hydrogen-Powered Equipment": {"CO2 Reduction": 20, "Cost": 6, "Implementation Years": 5},
-}
+scenario = routing.apply(scenarios.load("industry40"))  # Logistics impacts from the fleet model with GAME_ROUTING=1
+initiatives = scenario.initiatives
 
 # Initial settings
-starting_co2 = 100  # Initial CO2 level (percentage of baseline)
-co2_reduction_target = 30  # Target CO2 reduction percentage
-total_budget = 15  # Total budget in $M for all years
+starting_co2 = scenario.starting_level  # Initial CO2 level (percentage of baseline)
+co2_reduction_target = scenario.target  # Target CO2 reduction percentage
+total_budget = scenario.budget  # Total budget in $M for all years
 
 # Initialize session state
 if 'game_data' not in st.session_state:
@@ -39,6 +37,8 @@ if 'game_data' not in st.session_state:
     }
     st.session_state.remaining_budget = total_budget  # Initialize remaining budget
 
+metrics.lap("intro")
+
 # ------------------------------
 # 🏁 Game Loop
 # ------------------------------
@@ -50,9 +50,9 @@ for year in range(1, years + 1):
 
     selected_initiatives = st.multiselect(
         f"Select up to 3 initiatives for Year {year}",
-        list(initiatives.keys()),
+        scenario.names,
         default=[],
-        max_selections=3,
+        max_selections=scenario.max_selections,
     )
 
     if st.button(f"Confirm Choices for Year {year}"):
@@ -78,6 +78,8 @@ for year in range(1, years + 1):
 
     st.write("---")
 
+metrics.lap("year_loop")
+
 # ------------------------------
 # 📊 Results & Visualization
 # ------------------------------
@@ -124,4 +126,7 @@ if len(st.session_state.game_data["Year"]) > 0:
     if df_results["Remaining_CO2"].iloc[-1] <= starting_co2 - co2_reduction_target:
         st.success("🎉 Congratulations! You have optimized the supply chain for sustainability! 🎉")
     elif st.session_state.remaining_budget <= 0:
-        st.error("⚠️ Budget depleted! Try optimizing your strategy next time.")
\ No newline at end of file
+        st.error("⚠️ Budget depleted! Try optimizing your strategy next time.")
+
+metrics.lap("results")
+metrics.end_rerun(st.session_state)
@@ -1,6 +1,21 @@
 import streamlit as st
 import pandas as pd
-import matplotlib.pyplot as plt
+
+import charts
+import engine
+import experiments
+import explorer
+import metrics
+import plan_compare
+import planner
+import routing
+import scenarios
+import session_store
+import team_store
+import year_view
+
+metrics.begin_rerun(__file__)
+scenario = experiments.apply(routing.apply(scenarios.load("industry40")))  # Re-read on file changes; one variant per game (see experiments.py)
 
 # ------------------------------
 # 🎮 Game Introduction
@@ -8,7 +23,7 @@ import matplotlib.pyplot as plt
 
 st.title("🏭 Sustainable Industry Simulation Game: Industry 4.0 & Green Supply Chains")
 
-st.markdown("""
+st.markdown(f"""
 ## 📌 Achieving Sustainable Supply Chain Excellence through Green Servitisation Innovation
 ### 🎯 Goal:
 Transform a traditional manufacturing company into a **Green Servitisation-Oriented Business Model (GS-OBM)** by integrating **Industry 4.0 technologies**, **ESG compliance**, and **Green Sustainable Supply Chain Management (GSSCM)** over a **5-year period**.
@@ -22,7 +37,7 @@ You are the **Sustainability Director** of **EcoMotive Industries**, a leading m
 1. **Government Regulations & ESG Compliance**: New laws require all manufacturing firms to **reduce CO₂ emissions by 30% within 5 years**.
 2. **Industry 4.0 Technological Adoption**: The company must adopt **smart manufacturing, digital twins, IoT-based monitoring, and AI-driven logistics**.
 3. **Sustainable Supply Chain Management**: You must **reduce waste, improve resource efficiency, and enhance reverse logistics**.
-4. **Financial Constraints**: You have a **$15M budget** to make strategic investments while ensuring profitability.
+4. **Financial Constraints**: You have a **${scenario.budget:g}M budget** to make strategic investments while ensuring profitability.
 
 ---
 
@@ -54,46 +69,29 @@ Each initiative has **different costs, implementation time, and CO₂ impact**.
 st.sidebar.header("Game Settings")
 years = st.sidebar.slider("Select Simulation Years", min_value=3, max_value=7, value=5)
 
-import streamlit as st
-import pandas as pd
-import matplotlib.pyplot as plt
+metrics.lap("intro")
 
 # ------------------------------
 # 🎮 Game Configuration
 # ------------------------------
 
-st.title("🏭 Sustainable Industry Simulation Game: Industry 4.0 & Green Supply Chains")
-
-st.sidebar.header("Game Settings")
-years = st.sidebar.slider("Select Simulation Years", min_value=3, max_value=7, value=5)
-
 # Sustainability initiatives based on Servitisation & Green Supply Chain Management
-initiatives = {
-    "IoT-Enabled Smart Manufacturing": {"CO2 Reduction": 12, "Cost": 3, "Implementation Years": 3},
-    "AI-Optimized Logistics Routes": {"CO2 Reduction": 10, "Cost": 2, "Implementation Years": 2},
-    "Fleet Electrification": {"CO2 Reduction": 15, "Cost": 5, "Implementation Years": 4},
-    "Public Awareness & Green Branding": {"CO2 Reduction": 5, "Cost": 1, "Implementation Years": 1},
-    "Green Procurement (Sustainable Suppliers)": {"CO2 Reduction": 8, "Cost": 2, "Implementation Years": 2},
-    "Automated Sorting & Recycling System": {"CO2 Reduction": 15, "Cost": 4, "Implementation Years": 3},
-    "Reverse Logistics for Parts Recovery": {"CO2 Reduction": 10, "Cost": 2.5, "Implementation Years": 3},
-    "Hydrogen-Powered Equipment": {"CO2 Reduction": 20, "Cost": 6, "Implementation Years": 5},
-}
+initiatives = scenario.initiatives
 
 # Initial settings
-starting_co2 = 100  # Initial CO2 level (percentage of baseline)
-co2_reduction_target = 30  # Target CO2 reduction percentage
-total_budget = 15  # Total budget in $M for all years
-
-# Initialize session state
-if 'game_data' not in st.session_state:
-    st.session_state.game_data = {
-        "Year": [],
-        "Chosen Initiatives": [],
-        "CO2 Reduction": [],
-        "Total Cost": [],
-        "Remaining Budget": [],
-    }
-    st.session_state.remaining_budget = total_budget  # Initialize remaining budget
+starting_co2 = scenario.starting_level  # Initial CO2 level (percentage of baseline)
+co2_reduction_target = scenario.target  # Target CO2 reduction percentage
+total_budget = scenario.budget  # Total budget in $M for all years
+
+# Load this session's game (spilled to disk while idle)
+game_data = session_store.current_game(__file__, {
+    "Year": [],
+    "Chosen Initiatives": [],
+    "CO2 Reduction": [],
+    "Total Cost": [],
+    "Remaining Budget": [],
+}, scenario)
+team_store.follow(__file__)  # Teammates on the same game URL share it
 
 # ------------------------------
 # 🏁 Game Loop
@@ -101,86 +99,115 @@ if 'game_data' not in st.session_state:
 
 st.header("📅 Yearly Decision-Making")
 
-for year in range(1, years + 1):
+
+@st.fragment
+@metrics.fragment(__file__)
+def decide_year(year):
+    # Picking initiatives reruns only this year's block; a confirmed choice
+    # reruns the whole page so the results below are rebuilt once.
+    game_data = session_store.current_game(__file__)
+
     st.subheader(f"Year {year}")
+    team_store.show_proposal(__file__, year)
 
     # Use a unique key for each multiselect and button to avoid conflicts
     selected_initiatives = st.multiselect(
         f"Select up to 3 initiatives for Year {year}",
-        list(initiatives.keys()),
-        default=[],
-        max_selections=3,
+        scenario.names,
+        max_selections=scenario.max_selections,
         key=f"initiatives_{year}",  # Unique key for each multiselect
     )
 
+    # Show synergies and overlaps between the picked initiatives
+    bonus = engine.interaction(scenario, selected_initiatives)
+    if bonus:
+        st.caption(f"🔗 Combined effect of these initiatives: {bonus:+g} CO2 Reduction")
+
     # Use a unique key for each button to avoid conflicts
     if st.button(f"Confirm Choices for Year {year}", key=f"confirm_{year}"):
-        if not selected_initiatives:
-            st.warning("Please select at least one initiative.")
-        else:
-            total_co2_reduction = sum(initiatives[c]["CO2 Reduction"] for c in selected_initiatives)
-            total_cost = sum(initiatives[c]["Cost"] for c in selected_initiatives)
-
-            if total_cost > st.session_state.remaining_budget:
-                st.error("⚠️ Not enough budget to implement these initiatives. Please adjust your choices.")
+        with metrics.phase("confirm"):
+            if not selected_initiatives:
+                st.warning("Please select at least one initiative.")
             else:
-                st.session_state.remaining_budget -= total_cost  # Deduct from remaining budget
+                total_cost = engine.year_effect(scenario, selected_initiatives)[1]
+
+                try:
+                    # Refused if a teammate changed the game since this page was drawn
+                    with team_store.confirming(__file__, f"Year {year}: {', '.join(selected_initiatives)}") as game_data:
+                        # Budget left for this year, whatever was confirmed for it before
+                        remaining_budget = engine.budget_left(scenario, game_data, year)
+                        finished = len(game_data["Year"]) >= years
+
+                        if total_cost > remaining_budget:
+                            st.error("⚠️ Not enough budget to implement these initiatives. Please adjust your choices.")
+                        elif not engine.record(scenario, game_data, year, selected_initiatives):
+                            st.info(f"Year {year} already has these initiatives.")
+                        else:
+                            if not finished and len(game_data["Year"]) >= years:
+                                experiments.record(scenario, game_data)  # Counted once, when the last year is first confirmed
+                            st.session_state.saved_year = year
+                            st.rerun()
+                except team_store.Conflict:
+                    st.session_state.conflict_year = year
+                    st.rerun()
+
+    team_store.propose_button(__file__, year, selected_initiatives)
+
+    if st.session_state.get("saved_year") == year:
+        del st.session_state.saved_year
+        st.success(f"Year {year} decisions saved! See results below.")
+    if st.session_state.get("conflict_year") == year:
+        del st.session_state.conflict_year
+        st.warning("👥 A teammate changed the game while you were choosing. Their changes are shown now; please check your choice again.")
 
-                # Store data in session state
-                st.session_state.game_data["Year"].append(year)
-                st.session_state.game_data["Chosen Initiatives"].append(selected_initiatives)
-                st.session_state.game_data["CO2 Reduction"].append(total_co2_reduction)
-                st.session_state.game_data["Total Cost"].append(round(total_cost, 2))
-                st.session_state.game_data["Remaining Budget"].append(round(st.session_state.remaining_budget, 2))
+    st.write("---")
 
-                st.success(f"Year {year} decisions saved! See results below.")
 
-    st.write("---")
+for year in year_view.years_to_render(years, game_data, scenario):
+    decide_year(year)
+
+metrics.lap("year_loop")
 
 # ------------------------------
 # 📊 Results & Visualization
 # ------------------------------
 
-if len(st.session_state.game_data["Year"]) > 0:
-    df_results = pd.DataFrame(st.session_state.game_data)
+if len(game_data["Year"]) > 0:
+    df_results = pd.DataFrame(game_data)
 
     # Ensure cumulative CO2 reduction is tracked correctly
-    df_results["Cumulative_CO2_Reduction"] = df_results["CO2 Reduction"].cumsum()
-    df_results["Remaining_CO2"] = starting_co2 - df_results["Cumulative_CO2_Reduction"]
+    remaining_co2 = engine.levels(scenario, df_results["CO2 Reduction"])  # Additive or compounding, per scenario
+    df_results["Cumulative_CO2_Reduction"] = starting_co2 - remaining_co2
+    df_results["Remaining_CO2"] = remaining_co2
 
     st.header("📊 Game Summary")
-    st.write(df_results)
+    st.dataframe(df_results)
+    best = planner.best_plan(scenario, years)
+    label = "Best achievable" if best["optimal"] else "Best plan found (an estimate; better plans may exist)"
+    st.caption(f"🎯 {label} in {years} years: {best['reduction']} {scenario.metric} for ${best['cost']}M")
+    metrics.lap("results_table")
 
     # Fix CO2 reduction tracking and plot the corrected chart
     st.subheader("📉 CO2 Emission Reduction Over Time")
     
-    fig, ax = plt.subplots(figsize=(8, 5))
-
-    # Fix year formatting
-    df_results["Year"] = df_results["Year"].astype(int)
-
-    # Ensure CO2 levels decrease each year
-    ax.plot(
-        df_results["Year"],
-        df_results["Remaining_CO2"],
-        marker="o",
-        linestyle="-",
-        label="CO2 Reduction Progress",
+    charts.line_chart(
+        [("CO2 Reduction Progress", df_results["Year"], df_results["Remaining_CO2"])],
+        title="CO2 Emission Reduction Over Time",
+        ylabel="CO2 Emissions (% of baseline)",
+        target=starting_co2 - co2_reduction_target,
     )
-
-    # Draw the target reduction line
-    ax.axhline(y=starting_co2 - co2_reduction_target, color="r", linestyle="--", label="Target Reduction")
-
-    ax.set_xlabel("Year")
-    ax.set_ylabel("CO2 Emissions (% of baseline)")
-    ax.set_title("CO2 Emission Reduction Over Time")
-    ax.legend()
-    ax.grid(True)
-
-    st.pyplot(fig)
+    metrics.lap("chart")
 
     # Display Final Result
     if df_results["Remaining_CO2"].iloc[-1] <= starting_co2 - co2_reduction_target:
         st.success("🎉 Congratulations! You have optimized the supply chain for sustainability! 🎉")
-    elif st.session_state.remaining_budget <= 0:
-        st.error("⚠️ Budget depleted! Try optimizing your strategy next time.")
\ No newline at end of file
+    elif df_results["Remaining Budget"].iloc[-1] <= 0:
+        st.error("⚠️ Budget depleted! Try optimizing your strategy next time.")
+
+plan_compare.render(scenario, game_data)
+metrics.lap("plan_compare")
+
+explorer.render(scenario, years)
+metrics.lap("explorer")
+
+metrics.end_rerun(st.session_state)
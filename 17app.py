@@ -1,6 +1,22 @@
 import streamlit as st
 import pandas as pd
-import matplotlib.pyplot as plt
+
+import charts
+import engine
+import explorer
+import grid_profile
+import leaderboard
+import metrics
+import plan_compare
+import planner
+import scoring
+import scenarios
+import session_store
+import thermal
+import year_view
+
+metrics.begin_rerun(__file__)
+scenario = grid_profile.apply(scenarios.load("green_building"))  # Re-read on file changes; energy impacts from GAME_GRID_PROFILE, if set
 
 # ------------------------------
 # 🎮 Game Introduction
@@ -8,7 +24,7 @@ import matplotlib.pyplot as plt
 
 st.title("🏗️ Green Building Transformation: Sustainable Industry Simulation Game")
 
-st.markdown("""
+st.markdown(f"""
 ## 📌 Achieving Energy Efficiency with Recycled Materials & PCM
 ### 🎯 Goal:
 Reduce cooling loads and optimize energy efficiency in building enclosures using **Recycled Waste Paper (RWP) and Phase Change Materials (PCM)**.
@@ -21,7 +37,7 @@ Your mission: **Implement sustainable building materials** to cut **cooling load
 ### 🚀 **Key Challenges**
 1. **Reduce Cooling Load & Electricity Costs** 📉  
 2. **Optimize Material Sustainability & Noise Insulation** 🌱🔇  
-3. **Manage a $10M Budget Effectively** 💰  
+3. **Manage a ${scenario.budget:g}M Budget Effectively** 💰  
 
 ---
 ## 📅 Yearly Decision Process
@@ -44,109 +60,114 @@ Each decision affects **cost, cooling load reduction, & energy savings**.
 
 st.sidebar.header("Game Settings")
 years = st.sidebar.slider("Select Simulation Years", min_value=3, max_value=7, value=5)
+st.sidebar.text_input("Your name (for the leaderboard)", key="player_name")
+if st.sidebar.toggle("Derive cooling effects from an hourly building model", key="thermal_model"):
+    scenario = thermal.apply(scenario)  # Memoised per scenario version and building
+    st.sidebar.caption(" · ".join(f"{name}: -{scenario.initiatives[name][scenario.metric]:g}%" for name, _, _ in scenario.thermal))
+
+metrics.lap("intro")
 
 # ------------------------------
 # 🎯 Game Configuration
 # ------------------------------
-initiatives = {
-    "25% RWP + PCM Walls": {"Cooling Load Reduction": 5, "Cost": 2, "Implementation Years": 1},
-    "50% RWP + PCM Walls": {"Cooling Load Reduction": 10, "Cost": 3.5, "Implementation Years": 2},
-    "75% RWP + PCM Walls": {"Cooling Load Reduction": 15, "Cost": 5, "Implementation Years": 3},
-    "PCM Integrated Roof Coating": {"Cooling Load Reduction": 7, "Cost": 2, "Implementation Years": 2},
-    "IoT-Based Energy Monitoring": {"Cooling Load Reduction": 5, "Cost": 1.5, "Implementation Years": 1},
-    "Advanced Acoustic Panels": {"Noise Reduction": 7, "Cost": 1, "Implementation Years": 1},
-    "Hybrid Ventilation System": {"Cooling Load Reduction": 6, "Cost": 3, "Implementation Years": 2},
-    "Automated Insulation Adjustments": {"Cooling Load Reduction": 4, "Cost": 2.5, "Implementation Years": 1},
-}
+initiatives = scenario.initiatives
 
 # Initial settings
-starting_cooling_load = 100  # Initial cooling load (percentage of baseline)
-cooling_reduction_target = 30  # Target reduction percentage
-initial_budget = 10  # Initial budget in $M
+starting_cooling_load = scenario.starting_level  # Initial cooling load (percentage of baseline)
+cooling_reduction_target = scenario.target  # Target reduction percentage
+initial_budget = scenario.budget  # Initial budget in $M
 
 # ------------------------------
 # 🏁 Implementing Session State for Persistence
 # ------------------------------
-if "game_data" not in st.session_state:
-    st.session_state.game_data = {
-        "Year": [],
-        "Chosen Initiatives": [],
-        "Cooling Load Reduction": [],
-        "Total Cost": [],
-        "Remaining Budget": [],
-    }
+game_data = session_store.current_game(__file__, {
+    "Year": [],
+    "Chosen Initiatives": [],
+    "Cooling Load Reduction": [],
+    "Total Cost": [],
+    "Remaining Budget": [],
+}, scenario)
 
 # ------------------------------
 # 📅 Yearly Decision Process
 # ------------------------------
 st.header("📅 Yearly Decision-Making")
 
-for year in range(1, years + 1):
+
+@st.fragment
+@metrics.fragment(__file__)
+def decide_year(year):
+    # Picking initiatives reruns only this year's block; a confirmed choice
+    # reruns the whole page so the results below are rebuilt once.
+    game_data = session_store.current_game(__file__)
+
     st.subheader(f"Year {year}")
 
     selected_initiatives = st.multiselect(
         f"Select up to 3 initiatives for Year {year}",
-        list(initiatives.keys()),
+        scenario.names,
         default=[],
-        max_selections=3,
+        max_selections=scenario.max_selections,
     )
 
     if st.button(f"Confirm Choices for Year {year}"):
-        if not selected_initiatives:
-            st.warning("Please select at least one initiative.")
-        else:
-            total_cooling_reduction = sum(initiatives[c]["Cooling Load Reduction"] for c in selected_initiatives if "Cooling Load Reduction" in initiatives[c])
-            total_cost = sum(initiatives[c]["Cost"] for c in selected_initiatives)
-
-            # Ensure the budget is updated correctly
-            budget_left = (
-                st.session_state.game_data["Remaining Budget"][-1] - total_cost
-                if len(st.session_state.game_data["Remaining Budget"]) > 0
-                else initial_budget - total_cost
-            )
-
-            # Append data correctly to match list lengths
-            st.session_state.game_data["Year"].append(year)
-            st.session_state.game_data["Chosen Initiatives"].append(selected_initiatives)
-            st.session_state.game_data["Cooling Load Reduction"].append(total_cooling_reduction)
-            st.session_state.game_data["Total Cost"].append(round(total_cost, 2))
-            st.session_state.game_data["Remaining Budget"].append(round(budget_left, 2))
-
-            st.success(f"Year {year} decisions saved! See results below.")
+        with metrics.phase("confirm"):
+            if not selected_initiatives:
+                st.warning("Please select at least one initiative.")
+            else:
+                # One row per year: confirming a year again replaces it
+                if not engine.record(scenario, game_data, year, selected_initiatives):
+                    st.info(f"Year {year} already has these initiatives.")
+                else:
+                    if len(game_data["Year"]) >= years:
+                        # Finished games only; revising a year updates the entry
+                        leaderboard.submit(__file__, scenario, scoring.total(scenario, game_data), game_data)
+                    st.session_state.saved_year = year
+                    st.rerun()
+
+    if st.session_state.get("saved_year") == year:
+        del st.session_state.saved_year
+        st.success(f"Year {year} decisions saved! See results below.")
 
     st.write("---")
 
+
+for year in year_view.years_to_render(years, game_data, scenario):
+    decide_year(year)
+
+metrics.lap("year_loop")
+
 # ------------------------------
 # 📊 Results & Visualization
 # ------------------------------
-if len(st.session_state.game_data["Year"]) > 0:
-    df_results = pd.DataFrame(st.session_state.game_data)
+if len(game_data["Year"]) > 0:
+    df_results = pd.DataFrame(game_data)
 
     # Ensure cumulative Cooling Load Reduction is tracked correctly
-    df_results["Cumulative_Cooling_Reduction"] = df_results["Cooling Load Reduction"].cumsum()
-    df_results["Remaining_Cooling_Load"] = starting_cooling_load - df_results["Cumulative_Cooling_Reduction"]
+    remaining_cooling_load = engine.levels(scenario, df_results["Cooling Load Reduction"])  # Additive or compounding, per scenario
+    df_results["Cumulative_Cooling_Reduction"] = starting_cooling_load - remaining_cooling_load
+    df_results["Remaining_Cooling_Load"] = remaining_cooling_load
 
     st.header("📊 Game Summary")
-    st.write(df_results)
-
-    # Score Calculation
-    cooling_score = min(30, df_results["Cumulative_Cooling_Reduction"].iloc[-1] / cooling_reduction_target * 30)
-    budget_score = 10 if df_results["Remaining Budget"].iloc[-1] > 0 else 0
-
-    total_score = cooling_score + budget_score
+    st.dataframe(df_results)
+    best = planner.best_plan(scenario, years)
+    label = "Best achievable" if best["optimal"] else "Best plan found (an estimate; better plans may exist)"
+    st.caption(f"🎯 {label} in {years} years: {best['reduction']} {scenario.metric} for ${best['cost']}M")
+    metrics.lap("results_table")
+
+    # Score Calculation (the scenario's scoring rule)
+    total_score = scoring.total(scenario, game_data)
+    for name, value in scoring.metrics(scenario, game_data).items():
+        st.caption(f"🔇 {name}: {value}%")
     st.subheader(f"🏆 **Final Score: {total_score}/100**")
 
     # Cooling Load Chart
-    fig, ax = plt.subplots(figsize=(8, 5))
-    ax.plot(df_results["Year"], df_results["Remaining_Cooling_Load"], marker="o", linestyle="-", label="Cooling Load Reduction")
-
-    ax.set_xlabel("Year")
-    ax.set_ylabel("Cooling Load (% of baseline)")
-    ax.set_title("Cooling Load Reduction Over Time")
-    ax.legend()
-    ax.grid(True)
-
-    st.pyplot(fig)
+    charts.line_chart(
+        [("Cooling Load Reduction", df_results["Year"], df_results["Remaining_Cooling_Load"])],
+        title="Cooling Load Reduction Over Time",
+        ylabel="Cooling Load (% of baseline)",
+    )
+    metrics.lap("chart")
 
     if total_score >= 80:
         st.success("🎉 Congratulations! Your buildings are highly sustainable! 🎉")
@@ -154,3 +175,11 @@ if len(st.session_state.game_data["Year"]) > 0:
         st.warning("⚠️ Good progress, but more improvements are needed.")
     else:
         st.error("❌ You failed to meet sustainability goals.")
+
+plan_compare.render(scenario, game_data)
+metrics.lap("plan_compare")
+
+explorer.render(scenario, years)
+metrics.lap("explorer")
+
+metrics.end_rerun(st.session_state)
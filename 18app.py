@@ -1,6 +1,22 @@
 import streamlit as st
 import pandas as pd
-import matplotlib.pyplot as plt
+
+import charts
+import engine
+import explorer
+import leaderboard
+import metrics
+import percentiles
+import plan_compare
+import planner
+import scoring
+import scenarios
+import session_store
+import team_store
+import year_view
+
+metrics.begin_rerun(__file__)
+scenario = scenarios.load("kalundborg")  # Re-read when scenario_data/kalundborg.json changes
 
 # ------------------------------
 # 🎮 Game Introduction
@@ -8,7 +24,7 @@ import matplotlib.pyplot as plt
 
 st.title("🏭 Kalundborg Eco-Industrial Park Simulation Game")
 
-st.markdown("""
+st.markdown(f"""
 ## 📌 Industrial Symbiosis at Kalundborg: A Circular Economy Challenge
 ### 🎯 Goal:
 As the **Sustainability Manager**, optimize **waste reuse, CO₂ reduction, and financial sustainability** by making **strategic decisions** over a **5-year period**.
@@ -20,7 +36,7 @@ Your mission: **Expand this symbiosis model while ensuring environmental & finan
 
 ### 🚀 **Key Challenges**
 1. **Reduce CO₂ Emissions & Optimize Resource Sharing** ♻️  
-2. **Balance Financial Investments** 💰 **(Starting Budget: $50M)**  
+2. **Balance Financial Investments** 💰 **(Starting Budget: ${scenario.budget:g}M)**  
 3. **Maintain Regulatory & Stakeholder Satisfaction** 🏆  
 
 ---
@@ -45,106 +61,124 @@ Each decision impacts **CO₂ emissions, financial performance, and eco-industri
 st.sidebar.header("Game Settings")
 years = st.sidebar.slider("Select Simulation Years", min_value=3, max_value=7, value=5)
 
+metrics.lap("intro")
+
 # ------------------------------
 # 🎯 Game Configuration
 # ------------------------------
-initiatives = {
-    "Waste Heat Exchange System": {"CO2 Reduction": 10, "Cost": 10, "Implementation Years": 2},
-    "Water Recycling Infrastructure": {"CO2 Reduction": 15, "Cost": 12, "Implementation Years": 3},
-    "Biomass Energy Integration": {"CO2 Reduction": 12, "Cost": 15, "Implementation Years": 3},
-    "Carbon Capture & Storage (CCS)": {"CO2 Reduction": 20, "Cost": 18, "Implementation Years": 5},
-    "By-Product Sharing (Gypsum, Sulfur, Sludge)": {"CO2 Reduction": 8, "Cost": 7, "Implementation Years": 2},
-    "AI-Optimized Resource Allocation": {"CO2 Reduction": 5, "Cost": 5, "Implementation Years": 1},
-    "New Industry Partner Expansion": {"CO2 Reduction": 0, "Cost": 20, "Implementation Years": 4},
-    "Public Awareness & ESG Branding": {"CO2 Reduction": 0, "Cost": 3, "Implementation Years": 1},
-}
+initiatives = scenario.initiatives
 
 # Initial settings
-starting_co2 = 100  # Initial CO2 level (percentage of baseline)
-co2_reduction_target = 40  # Target CO2 reduction percentage
-initial_budget = 50  # Initial budget in $M
+starting_co2 = scenario.starting_level  # Initial CO2 level (percentage of baseline)
+co2_reduction_target = scenario.target  # Target CO2 reduction percentage
+initial_budget = scenario.budget  # Initial budget in $M
 
 # ------------------------------
 # 🏁 Implementing Session State for Persistence
 # ------------------------------
-if "game_data" not in st.session_state:
-    st.session_state.game_data = {
-        "Year": [],
-        "Chosen Initiatives": [],
-        "CO2 Reduction": [],
-        "Total Cost": [],
-        "Remaining Budget": [],
-    }
+game_data = session_store.current_game(__file__, {
+    "Year": [],
+    "Chosen Initiatives": [],
+    "CO2 Reduction": [],
+    "Total Cost": [],
+    "Remaining Budget": [],
+}, scenario)
+team_store.follow(__file__)  # Teammates on the same game URL share it
 
 # ------------------------------
 # 📅 Yearly Decision Process
 # ------------------------------
 st.header("📅 Yearly Decision-Making")
 
-for year in range(1, years + 1):
+
+@st.fragment
+@metrics.fragment(__file__)
+def decide_year(year):
+    # Picking initiatives reruns only this year's block; a confirmed choice
+    # reruns the whole page so the results below are rebuilt once.
     st.subheader(f"Year {year}")
+    team_store.show_proposal(__file__, year)
 
     selected_initiatives = st.multiselect(
         f"Select up to 3 initiatives for Year {year}",
-        list(initiatives.keys()),
-        default=[],
-        max_selections=3,
+        scenario.names,
+        max_selections=scenario.max_selections,
+        key=f"initiatives_{year}",
     )
 
-    if st.button(f"Confirm Choices for Year {year}"):
-        if not selected_initiatives:
-            st.warning("Please select at least one initiative.")
-        else:
-            total_co2_reduction = sum(initiatives[c]["CO2 Reduction"] for c in selected_initiatives)
-            total_cost = sum(initiatives[c]["Cost"] for c in selected_initiatives)
+    if st.button(f"Confirm Choices for Year {year}", key=f"confirm_{year}"):
+        with metrics.phase("confirm"):
+            if not selected_initiatives:
+                st.warning("Please select at least one initiative.")
+            else:
+                try:
+                    # Refused if a teammate changed the game since this page was drawn
+                    with team_store.confirming(__file__, f"Year {year}: {', '.join(selected_initiatives)}") as game_data:
+                        # One row per year: confirming a year again replaces it
+                        finished = len(game_data["Year"]) >= years
+                        if not engine.record(scenario, game_data, year, selected_initiatives):
+                            st.info(f"Year {year} already has these initiatives.")
+                        else:
+                            if not finished and len(game_data["Year"]) >= years:
+                                # Counted once, when the last year is first confirmed
+                                percentiles.record(percentiles.sketch_name(scenario), scoring.total(scenario, game_data))
+                            if len(game_data["Year"]) >= years:
+                                # Finished games only; revising a year updates the entry
+                                leaderboard.submit(__file__, scenario, scoring.total(scenario, game_data), game_data)
+                            st.session_state.saved_year = year
+                            st.rerun()
+                except team_store.Conflict:
+                    st.session_state.conflict_year = year
+                    st.rerun()
+
+    team_store.propose_button(__file__, year, selected_initiatives)
+
+    if st.session_state.get("saved_year") == year:
+        del st.session_state.saved_year
+        st.success(f"Year {year} decisions saved! See results below.")
+    if st.session_state.get("conflict_year") == year:
+        del st.session_state.conflict_year
+        st.warning("👥 A teammate changed the game while you were choosing. Their changes are shown now; please check your choice again.")
 
-            budget_left = (
-                st.session_state.game_data["Remaining Budget"][-1] - total_cost
-                if len(st.session_state.game_data["Remaining Budget"]) > 0
-                else initial_budget - total_cost
-            )
+    st.write("---")
 
-            st.session_state.game_data["Year"].append(year)
-            st.session_state.game_data["Chosen Initiatives"].append(selected_initiatives)
-            st.session_state.game_data["CO2 Reduction"].append(total_co2_reduction)
-            st.session_state.game_data["Total Cost"].append(round(total_cost, 2))
-            st.session_state.game_data["Remaining Budget"].append(round(budget_left, 2))
 
-            st.success(f"Year {year} decisions saved! See results below.")
+for year in year_view.years_to_render(years, game_data, scenario):
+    decide_year(year)
 
-    st.write("---")
+metrics.lap("year_loop")
 
 # ------------------------------
 # 📊 Results & Visualization
 # ------------------------------
-if len(st.session_state.game_data["Year"]) > 0:
-    df_results = pd.DataFrame(st.session_state.game_data)
-    df_results["Cumulative_CO2_Reduction"] = df_results["CO2 Reduction"].cumsum()
-    df_results["Remaining_CO2"] = starting_co2 - df_results["Cumulative_CO2_Reduction"]
+if len(game_data["Year"]) > 0:
+    df_results = pd.DataFrame(game_data)
+    remaining_co2 = engine.levels(scenario, df_results["CO2 Reduction"])  # Additive or compounding, per scenario
+    df_results["Cumulative_CO2_Reduction"] = starting_co2 - remaining_co2
+    df_results["Remaining_CO2"] = remaining_co2
 
     st.header("📊 Game Summary")
-    st.write(df_results)
+    st.dataframe(df_results)
+    best = planner.best_plan(scenario, years)
+    label = "Best achievable" if best["optimal"] else "Best plan found (an estimate; better plans may exist)"
+    st.caption(f"🎯 {label} in {years} years: {best['reduction']} {scenario.metric} for ${best['cost']}M")
+    metrics.lap("results_table")
 
-    # Score Calculation
-    co2_score = min(30, df_results["Cumulative_CO2_Reduction"].iloc[-1] / co2_reduction_target * 30)
-    budget_score = 10 if df_results["Remaining Budget"].iloc[-1] > 5 else 0
-    stakeholder_score = 15 if "Public Awareness & ESG Branding" in st.session_state.game_data["Chosen Initiatives"] else 5
-    industry_growth_score = 15 if "New Industry Partner Expansion" in st.session_state.game_data["Chosen Initiatives"] else 5
-    total_score = co2_score + budget_score + stakeholder_score + industry_growth_score
+    # Score Calculation (the scenario's scoring rule)
+    total_score = scoring.total(scenario, game_data)
 
     st.subheader(f"🏆 **Final Score: {total_score}/100**")
+    if len(game_data["Year"]) >= years:
+        beaten, players = percentiles.beaten(percentiles.sketch_name(scenario), total_score)
+        st.caption(f"📈 You beat {beaten}% of the {players} players who finished this scenario.")
 
     # CO2 Reduction Chart
-    fig, ax = plt.subplots(figsize=(8, 5))
-    ax.plot(df_results["Year"], df_results["Remaining_CO2"], marker="o", linestyle="-", label="CO2 Reduction")
-
-    ax.set_xlabel("Year")
-    ax.set_ylabel("CO2 Emissions (% of baseline)")
-    ax.set_title("CO2 Emission Reduction Over Time")
-    ax.legend()
-    ax.grid(True)
-
-    st.pyplot(fig)
+    charts.line_chart(
+        [("CO2 Reduction", df_results["Year"], df_results["Remaining_CO2"])],
+        title="CO2 Emission Reduction Over Time",
+        ylabel="CO2 Emissions (% of baseline)",
+    )
+    metrics.lap("chart")
 
     if total_score >= 80:
         st.success("🎉 Congratulations! Your industrial symbiosis model is a success!")
@@ -152,3 +186,11 @@ if len(st.session_state.game_data["Year"]) > 0:
         st.warning("⚠️ Good progress, but improvements are needed.")
     else:
         st.error("❌ You failed to meet sustainability goals.")
+
+plan_compare.render(scenario, game_data)
+metrics.lap("plan_compare")
+
+explorer.render(scenario, years)
+metrics.lap("explorer")
+
+metrics.end_rerun(st.session_state)
@@ -0,0 +1,146 @@
+import streamlit as st
+import pandas as pd
+
+import charts
+import engine
+import market
+import metrics
+import scenarios
+
+metrics.begin_rerun(__file__)
+
+# ------------------------------
+# 🎮 Game Introduction
+# ------------------------------
+
+st.title("🏪 Green Market Challenge: Competing for Shared Resources")
+
+st.markdown("""
+## 📌 Many Firms, One Market
+### 🎯 Goal:
+Every player runs a **firm** in the same scenario. Reduce your CO₂ emissions within your budget,
+while the other firms in your room chase the same **green suppliers, by-products and waste heat**.
+
+---
+### 📅 How a Year Works
+1. Each firm picks **up to 3 initiatives** and submits them.
+2. When every firm has submitted (or the host closes the year), the year is resolved for the whole room at once.
+3. Initiatives that draw on a **shared pool** can only serve part of the firms each year.
+   If more firms ask for them, a **lottery** decides; firms that miss out do not pay for them.
+
+---
+""")
+
+st.sidebar.header("Market Room")
+code = market.room_code(st.sidebar.text_input("Room code", key="market_room"))
+firm = st.sidebar.text_input("Your firm's name", key="market_firm").strip()
+
+metrics.lap("intro")
+
+# ------------------------------
+# 🚪 Joining a Room
+# ------------------------------
+
+if not code or not firm:
+    st.info("Enter a room code and your firm's name in the sidebar to join a market.")
+    metrics.end_rerun(st.session_state)
+    st.stop()
+
+room = market.get_room(code)
+if room is None:
+    # The first player to use a room code opens it and becomes its host
+    st.header(f"🆕 Open Room {code}")
+    market_scenarios = [scenario_id for scenario_id in scenarios.available() if scenarios.load(scenario_id).pools]
+    scenario_id = st.selectbox("Scenario", market_scenarios, format_func=lambda scenario_id: scenarios.load(scenario_id).title)
+    room_years = st.slider("Select Simulation Years", min_value=3, max_value=7, value=5)
+    if st.button("Open Room"):
+        market.open_room(code, scenario_id, room_years, firm)
+        st.rerun()
+    metrics.end_rerun(st.session_state)
+    st.stop()
+
+market.join(room, firm)
+scenario = room.scenario
+st.session_state.market_seen = room.version
+
+
+@st.fragment(run_every=market.POLL_SECONDS)
+def watch_room():
+    # Only the room's version number is checked; the page reruns when it moved
+    if room.version != st.session_state.get("market_seen"):
+        st.rerun()
+
+
+watch_room()
+
+# ------------------------------
+# 📅 This Year's Decision
+# ------------------------------
+
+st.header(f"{scenario.title} · Room {code}")
+for pool, share, members in scenario.pools:
+    st.caption(f"🔒 {pool}: {', '.join(members)} — available to {share:.0%} of firms each year")
+
+if room.finished:
+    st.info(f"🏁 All {room.years} years are resolved. See the standings below.")
+else:
+    submitted = len(room.submissions)
+    st.progress(submitted / len(room.firms), text=f"Year {room.year}: {submitted} of {len(room.firms)} firms submitted")
+
+    if firm in room.submissions:
+        chosen = room.submissions[firm]
+        st.success(f"Year {room.year} submitted: {', '.join(chosen) or 'no initiatives'}. Waiting for the other firms...")
+    else:
+        selected_initiatives = st.multiselect(
+            f"Select up to 3 initiatives for Year {room.year}",
+            scenario.names,
+            max_selections=scenario.max_selections,
+            key=f"market_initiatives_{room.year}",
+        )
+        if st.button(f"Submit Choices for Year {room.year}"):
+            with metrics.phase("confirm"):
+                try:
+                    market.submit(room, firm, selected_initiatives)
+                except ValueError as error:
+                    st.error(str(error))
+                else:
+                    st.rerun()
+
+    if firm == room.host and st.button(f"Close Year {room.year} Now (host)"):
+        market.close_year(room)
+        st.rerun()
+
+metrics.lap("year_loop")
+
+# ------------------------------
+# 📊 Results & Visualization
+# ------------------------------
+
+game_data = market.ledger(room, firm)
+
+if len(game_data["Year"]) > 0:
+    last_year = game_data["Year"][-1]
+    lost = room.lost.get((last_year, firm))
+    if lost:
+        st.warning(f"🎲 Your firm lost the lottery for {', '.join(lost)} in Year {last_year}; it was not implemented or paid.")
+
+    df_results = pd.DataFrame(game_data)
+    remaining_co2 = engine.levels(scenario, df_results[scenario.metric])  # Additive or compounding, per scenario
+    df_results["Remaining_CO2"] = remaining_co2
+
+    st.header("📊 Your Firm")
+    st.dataframe(df_results)
+    metrics.lap("results_table")
+
+    charts.line_chart(
+        [(firm, df_results["Year"], df_results["Remaining_CO2"])],
+        title="CO2 Emission Reduction Over Time",
+        ylabel="CO2 Emissions (% of baseline)",
+        target=scenario.starting_level - scenario.target,
+    )
+    metrics.lap("chart")
+
+    st.header("🏆 Room Standings")
+    st.dataframe(market.standings(room))
+
+metrics.end_rerun(st.session_state)
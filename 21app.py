@@ -0,0 +1,50 @@
+import streamlit as st
+import pandas as pd
+from datetime import datetime
+
+import leaderboard
+import metrics
+
+metrics.begin_rerun(__file__)
+
+# ------------------------------
+# 🏆 Live Leaderboard (for projectors and instructors)
+# ------------------------------
+
+st.set_page_config(page_title="Live Leaderboard", layout="wide")
+st.title("🏆 Live Leaderboard")
+
+boards = leaderboard.boards()
+if not boards:
+    st.info("No scores yet. Scores appear here as soon as players of the scoring games (17app, 18app, 19app) finish a game.")
+    st.button("Check again")
+    metrics.end_rerun(st.session_state)
+    st.stop()
+
+app = st.sidebar.selectbox("Game", list(boards), format_func=lambda app: f"{boards[app]} ({app})")
+
+
+# Every viewer gets the same shared snapshot; the board rebuilds it at most
+# once per refresh interval, so any number of screens can stay open.
+@st.fragment(run_every=leaderboard.REFRESH_SECONDS)
+@metrics.fragment(__file__)
+def live_board():
+    snapshot = leaderboard.snapshot(app)
+    st.caption(f"{snapshot['players']} players · updated {datetime.fromtimestamp(snapshot['updated']):%H:%M:%S}")
+
+    left, right = st.columns(2)
+    with left:
+        st.subheader(f"🥇 Top {leaderboard.TOP_N}")
+        st.dataframe(pd.DataFrame(snapshot["top"]), hide_index=True)
+    with right:
+        st.subheader("📊 Score Distribution")
+        st.bar_chart(pd.Series(snapshot["histogram"], name="Players"))
+
+    st.subheader("🌱 Most Popular Initiatives")
+    st.bar_chart(pd.Series(snapshot["popularity"], name="Games", dtype=float), horizontal=True)
+
+
+live_board()
+
+metrics.lap("board")
+metrics.end_rerun(st.session_state)
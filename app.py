@@ -3,6 +3,12 @@ import pandas as pd
 import random
 import matplotlib.pyplot as plt
 
+import grid_profile
+import metrics
+import scenarios
+
+metrics.begin_rerun(__file__)
+
 # ------------------------------
 # 🎮 Game Configuration
 # ------------------------------
@@ -13,21 +19,14 @@ st.sidebar.header("Game Settings")
 years = st.sidebar.slider("Select Simulation Years", min_value=5, max_value=10, value=5)
 
 # Sustainability initiatives
-initiatives = {
-    "Solar Panels": {"CO2 Reduction": 10, "Cost": 2, "Implementation Years": 2},
-    "Heat Recovery System": {"CO2 Reduction": 7, "Cost": 1.5, "Implementation Years": 3},
-    "Green Hydrogen": {"CO2 Reduction": 20, "Cost": 5, "Implementation Years": 4},
-    "Recycled Materials": {"CO2 Reduction": 8, "Cost": 1, "Implementation Years": 1},
-    "Electrify Logistics Fleet": {"CO2 Reduction": 12, "Cost": 3, "Implementation Years": 2},
-    "IoT Energy Monitoring": {"CO2 Reduction": 5, "Cost": 1, "Implementation Years": 1},
-    "Staff Green Training": {"CO2 Reduction": 3, "Cost": 0.5, "Implementation Years": 1},
-}
+scenario = grid_profile.apply(scenarios.load("baseline"))  # Energy impacts from GAME_GRID_PROFILE, if set
+initiatives = scenario.initiatives
 
 
 
-starting_co2 = 100
-co2_reduction_target = 50
-budget = 10
+starting_co2 = scenario.starting_level
+co2_reduction_target = scenario.target
+budget = scenario.budget
 
 game_data = {
     "Year": [],
@@ -38,6 +37,8 @@ game_data = {
    
 }
 
+metrics.lap("intro")
+
 # ------------------------------
 # 🏁 Game Loop
 # ------------------------------
@@ -49,9 +50,9 @@ for year in range(1, years + 1):
 
     selected_initiatives = st.multiselect(
         f"Select up to 3 initiatives for Year {year}", 
-        list(initiatives.keys()), 
+        scenario.names, 
         default=[], 
-        max_selections=3
+        max_selections=scenario.max_selections
     )
 
     if st.button(f"Confirm Choices for Year {year}"):
@@ -75,6 +76,8 @@ for year in range(1, years + 1):
 
     st.write("---")
 
+metrics.lap("year_loop")
+
 # ------------------------------
 # 📊 Results & Visualization
 # ------------------------------
@@ -103,3 +106,5 @@ if len(game_data["Year"]) > 0:
     elif budget <= 0:
         st.error("⚠️ Budget depleted! Try optimizing your strategy next time.")
 
+metrics.lap("results")
+metrics.end_rerun(st.session_state)
@@ -0,0 +1,128 @@
+import hashlib
+import io
+import json
+import os
+import threading
+from collections import OrderedDict
+
+import streamlit as st
+from matplotlib.figure import Figure
+
+import metrics
+
+# ------------------------------
+# 🖼️ Chart Encoding with a Size Budget
+# ------------------------------
+# Charts are described by their data (series, target line, labels) rather
+# than by a live figure. The spec plus the client's hints is hashed; the
+# encoded image is cached per process, so identical trajectories (many
+# students pick the same plans) are drawn and encoded once.
+#
+#   GAME_CHART_BUDGET    target bytes per image (default 60000)
+#   GAME_CHART_FORMATS   formats to try, in order (default "svg,webp,png")
+#   GAME_CHART_CACHE_MB  encoded-image cache size (default 64)
+
+BUDGET = int(os.environ.get("GAME_CHART_BUDGET", "60000"))
+FORMATS = tuple(os.environ.get("GAME_CHART_FORMATS", "svg,webp,png").split(","))
+CACHE_BYTES = int(float(os.environ.get("GAME_CHART_CACHE_MB", "64")) * 1024 * 1024)
+FIGSIZE = (8, 5)
+DPI_LADDER = (200, 150, 100, 80, 64, 50)
+
+_lock = threading.Lock()
+_cache = OrderedDict()  # spec hash -> (format, data)
+_cache_size = 0
+
+
+def _client_hints():
+    # Device pixel ratio and Save-Data, when the browser sends them
+    try:
+        headers = st.context.headers
+    except Exception:
+        return 1.0, False
+    try:
+        dpr = float(headers.get("Sec-CH-DPR") or headers.get("DPR") or 1.0)
+    except ValueError:
+        dpr = 1.0
+    save_data = (headers.get("Save-Data") or "").lower() == "on"
+    return min(max(dpr, 1.0), 2.0), save_data
+
+
+def _draw(spec):
+    fig = Figure(figsize=FIGSIZE)
+    ax = fig.subplots()
+    for label, xs, ys in spec["series"]:
+        ax.plot(xs, ys, marker="o", linestyle="-", label=label)
+    if spec["target"] is not None:
+        ax.axhline(y=spec["target"], color="r", linestyle="--", label="Target Reduction")
+    ax.set_xlabel(spec["xlabel"])
+    ax.set_ylabel(spec["ylabel"])
+    ax.set_title(spec["title"])
+    ax.legend()
+    ax.grid(True)
+    return fig
+
+
+def _encode(fig, fmt, dpi=None):
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format=fmt, dpi=dpi, metadata={"Date": None} if fmt == "svg" else None)
+    return buffer.getvalue()
+
+
+def encode(spec, budget, dpr=1.0):
+    # Try each format (and, for raster formats, each DPI from sharp to
+    # coarse) and keep the first encoding that fits the budget. If nothing
+    # fits, the smallest encoding produced wins.
+    fig = _draw(spec)
+    supported = fig.canvas.get_supported_filetypes()
+    target_dpi = 100 * dpr
+    smallest = None
+    for fmt in FORMATS:
+        if fmt not in supported:
+            continue
+        dpis = [None] if fmt == "svg" else [dpi for dpi in DPI_LADDER if dpi <= target_dpi]
+        for dpi in dpis:
+            data = _encode(fig, fmt, dpi)
+            if smallest is None or len(data) < len(smallest[1]):
+                smallest = (fmt, data)
+            if len(data) <= budget:
+                return fmt, data
+    return smallest
+
+
+def cached_image(spec):
+    global _cache_size
+    dpr, save_data = _client_hints()
+    budget = BUDGET // 2 if save_data else BUDGET
+    key = hashlib.sha1(json.dumps([spec, budget, dpr, FORMATS], sort_keys=True).encode()).hexdigest()
+
+    with _lock:
+        hit = _cache.get(key)
+        if hit is not None:
+            _cache.move_to_end(key)
+            return hit
+
+    fmt, data = encode(spec, budget, dpr)
+
+    with _lock:
+        if key not in _cache:
+            _cache[key] = (fmt, data)
+            _cache_size += len(data)
+            while _cache_size > CACHE_BYTES and len(_cache) > 1:
+                _, (_, old) = _cache.popitem(last=False)
+                _cache_size -= len(old)
+        size = _cache_size
+    metrics.set_gauge("game_chart_cache_bytes", size)
+    return fmt, data
+
+
+def line_chart(series, title, ylabel, target=None, xlabel="Year"):
+    # series: [(label, xs, ys), ...]
+    spec = {
+        "series": [[label, [float(x) for x in xs], [float(y) for y in ys]] for label, xs, ys in series],
+        "target": None if target is None else float(target),
+        "title": title,
+        "xlabel": xlabel,
+        "ylabel": ylabel,
+    }
+    fmt, data = cached_image(spec)
+    st.image(data.decode() if fmt == "svg" else data, width="stretch")
@@ -0,0 +1,94 @@
+import argparse
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+import engine
+import scenarios
+
+# ------------------------------
+# 🔀 Cross-Scenario Strategy Comparison
+# ------------------------------
+# Plays one strategy through every registered scenario in a process pool
+# and returns a scenario x metric table:
+#
+#   python compare.py cheapest_three --years 5
+#
+# A strategy is a module-level function (so it can be sent to the worker
+# processes) called once per year as strategy(scenario, year,
+# remaining_budget) and returning the initiative names to pick. As in the
+# apps, a pick that costs more than the remaining budget is refused and
+# that year passes without initiatives ("Refused Years" counts them).
+
+
+def cheapest_three(scenario, year, remaining_budget):
+    ranked = sorted(scenario.names, key=lambda name: scenario.initiatives[name]["Cost"])
+    return ranked[: scenario.max_selections]
+
+
+def best_ratio(scenario, year, remaining_budget):
+    # Greedy on reduction per $M among the initiatives still affordable
+    def ratio(name):
+        reduction, cost = engine.year_effect(scenario, [name])
+        return reduction / cost if cost else float("inf")
+
+    chosen = []
+    for name in sorted(scenario.names, key=ratio, reverse=True):
+        if len(chosen) == scenario.max_selections:
+            break
+        cost = scenario.initiatives[name]["Cost"]
+        if engine.year_effect(scenario, [name])[0] > 0 and cost <= remaining_budget:
+            chosen.append(name)
+            remaining_budget -= cost
+    return chosen
+
+
+def max_impact(scenario, year, remaining_budget):
+    ranked = sorted(scenario.names, key=lambda name: engine.year_effect(scenario, [name])[0], reverse=True)
+    return ranked[: scenario.max_selections]
+
+
+STRATEGIES = {
+    "cheapest_three": cheapest_three,
+    "best_ratio": best_ratio,
+    "max_impact": max_impact,
+}
+
+
+def run_strategy(scenario_id, strategy, years):
+    scenario = scenarios.load(scenario_id)
+    plan = []
+    remaining_budget = scenario.budget
+    refused = 0
+    for year in range(1, years + 1):
+        chosen = list(strategy(scenario, year, remaining_budget))
+        cost = engine.year_effect(scenario, chosen)[1]
+        if cost > remaining_budget:
+            refused += 1
+            chosen, cost = [], 0
+        remaining_budget -= cost
+        plan.append(chosen)
+    summary = engine.summarize(scenario, engine.play(scenario, plan))
+    summary["Refused Years"] = refused
+    return scenario_id, summary
+
+
+def compare(strategy, years=5, scenario_ids=None, workers=None):
+    if isinstance(strategy, str):
+        strategy = STRATEGIES[strategy]
+    scenario_ids = list(scenario_ids or scenarios.available())
+    workers = workers or min(len(scenario_ids), os.cpu_count() or 1)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        results = pool.map(run_strategy, scenario_ids, [strategy] * len(scenario_ids), [years] * len(scenario_ids))
+        rows = dict(results)
+    return pd.DataFrame.from_dict(rows, orient="index").rename_axis("Scenario")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare one strategy across all scenarios.")
+    parser.add_argument("strategy", choices=sorted(STRATEGIES))
+    parser.add_argument("--years", type=int, default=5)
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+    print(compare(args.strategy, years=args.years, workers=args.workers).to_string())
@@ -0,0 +1,139 @@
+from bisect import bisect_left
+from functools import lru_cache
+
+import numpy as np
+
+# ------------------------------
+# ⚙️ Game Engine
+# ------------------------------
+# The yearly bookkeeping the apps do inline, as plain functions over a
+# Scenario so plans can be played and scored outside Streamlit.
+
+
+def year_effect(scenario, chosen):
+    # Initiatives without the scenario's metric (e.g. acoustic panels in
+    # the green-building catalog) contribute cost but no reduction
+    reduction = sum(scenario.initiatives[name].get(scenario.metric, 0) for name in chosen)
+    cost = sum(scenario.initiatives[name]["Cost"] for name in chosen)
+    return reduction + interaction(scenario, chosen), cost
+
+
+def interaction(scenario, chosen):
+    # Extra (or, for overlaps, lost) reduction from pairs picked together
+    chosen = set(chosen)
+    return sum(amount for first, second, amount in scenario.synergies if first in chosen and second in chosen)
+
+
+def new_game(scenario):
+    return {
+        "Year": [],
+        "Chosen Initiatives": [],
+        scenario.metric: [],
+        "Total Cost": [],
+        "Remaining Budget": [],
+    }
+
+
+def record(scenario, game_data, year, chosen):
+    # The ledger holds one row per year, in year order. Confirming a year
+    # again replaces its row; confirming the same choices again changes
+    # nothing and returns False. Remaining budgets are re-derived from the
+    # costs, so the ledger never grows beyond the horizon.
+    chosen = list(chosen)
+    years = game_data["Year"]
+    reduction, cost = year_effect(scenario, chosen)
+    row = bisect_left(years, year)
+    if row < len(years) and years[row] == year:
+        if sorted(game_data["Chosen Initiatives"][row]) == sorted(chosen):
+            return False
+        game_data["Chosen Initiatives"][row] = chosen
+        game_data[scenario.metric][row] = reduction
+        game_data["Total Cost"][row] = round(cost, 2)
+    else:
+        years.insert(row, year)
+        game_data["Chosen Initiatives"].insert(row, chosen)
+        game_data[scenario.metric].insert(row, reduction)
+        game_data["Total Cost"].insert(row, round(cost, 2))
+        game_data["Remaining Budget"].insert(row, None)
+
+    remaining_budget = scenario.budget
+    for i, cost in enumerate(game_data["Total Cost"]):
+        remaining_budget -= cost
+        game_data["Remaining Budget"][i] = round(remaining_budget, 2)
+    return True
+
+
+def budget_left(scenario, game_data, year):
+    # Budget available for `year`, counting every other confirmed year
+    spent = sum(cost for other, cost in zip(game_data["Year"], game_data["Total Cost"]) if other != year)
+    return scenario.budget - spent
+
+
+def play(scenario, plan):
+    # plan: one list of initiative names per year
+    game_data = new_game(scenario)
+    for year, chosen in enumerate(plan, start=1):
+        record(scenario, game_data, year, chosen)
+    return game_data
+
+
+def levels(scenario, reductions):
+    # Remaining level after each year, along the last axis, so the same
+    # call serves one game's column and a (plans, years) batch.
+    # additive:    start - cumsum(r)
+    # compounding: start * prod(1 - r/100), summed as logs so long horizons
+    #              and big batches stay one cumsum; a 100% cut floors at 0
+    reductions = np.asarray(reductions, dtype=float)
+    if scenario.reduction_model == "additive":
+        return scenario.starting_level - np.cumsum(reductions, axis=-1)
+    kept = np.clip(1 - reductions / 100, 0, None)
+    with np.errstate(divide="ignore"):
+        return scenario.starting_level * np.exp(np.cumsum(np.log(kept), axis=-1))
+
+
+def step(scenario, level, reduction):
+    # One year of levels(), for incremental bookkeeping
+    if scenario.reduction_model == "additive":
+        return level - reduction
+    return level * max(1 - reduction / 100, 0)
+
+
+def summarize(scenario, game_data):
+    total_cost = sum(game_data["Total Cost"])
+    final_level = float(levels(scenario, game_data[scenario.metric])[-1]) if game_data["Year"] else scenario.starting_level
+    total_reduction = scenario.starting_level - final_level
+    return {
+        "Final Level": round(final_level, 2),
+        "Total Reduction": round(total_reduction, 2),
+        "Total Cost": round(total_cost, 2),
+        "Remaining Budget": round(scenario.budget - total_cost, 2),
+        "Target Met": final_level <= scenario.starting_level - scenario.target,
+        "Over Budget": total_cost > scenario.budget,
+    }
+
+
+# ------------------------------
+# 🌳 Prefix-Shared Plan Evaluation
+# ------------------------------
+# Plans that share their first years share the cached state after those
+# years, so a variant that differs only in Year 5 recomputes from Year 5.
+
+
+def plan_key(plan):
+    # Order within a year does not change the outcome
+    return tuple(tuple(sorted(chosen)) for chosen in plan)
+
+
+@lru_cache(maxsize=65536)
+def state_after(scenario, prefix):
+    # (remaining level, remaining budget) after the years in `prefix`
+    if not prefix:
+        return scenario.starting_level, scenario.budget
+    level, budget = state_after(scenario, prefix[:-1])
+    reduction, cost = year_effect(scenario, prefix[-1])
+    return step(scenario, level, reduction), budget - cost
+
+
+def trajectory(scenario, plan):
+    key = plan_key(plan)
+    return [state_after(scenario, key[:n]) for n in range(1, len(key) + 1)]
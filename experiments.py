@@ -0,0 +1,189 @@
+import argparse
+import dataclasses
+import glob
+import hashlib
+import json
+import math
+import os
+import threading
+import uuid
+from functools import lru_cache
+
+import pandas as pd
+
+import engine
+import session_store
+
+# ------------------------------
+# 🧪 A/B Experiments on Scenario Variants
+# ------------------------------
+# A scenario file can declare experiments, each a set of named variants
+# that override a few numbers:
+#
+#   "experiments": {"budget_15_vs_13": {"control": {}, "tight_budget": {"budget": 13}}}
+#
+# A game is assigned to a variant by hashing "<experiment>:<game id>", so
+# the same game always gets the same variant and experiments are assigned
+# independently. When a game's last year is confirmed, its outcome is
+# folded into running aggregates per variant (count, Welford mean and
+# variance, target-met counter); games themselves are not kept. Each
+# server process writes the aggregates of the games it saw to
+# GAME_STATE_DIR/experiments/<process>.json, a few numbers per variant, and
+# compare() merges the files of all processes (Chan et al.'s parallel
+# variance), so no process overwrites another's games.
+#
+#   python experiments.py budget_15_vs_13
+
+OUTCOMES = ("Total Reduction", "Remaining Budget")  # Tracked as mean/variance
+STATS_DIR = os.path.join(session_store.STATE_DIR, "experiments")
+PROCESS_ID = uuid.uuid4().hex  # File name of this process's aggregates
+
+_lock = threading.Lock()
+_arms = {}  # variant scenario version -> ((experiment, variant), ...)
+_own = {}  # Aggregates of the games finished in this process, as in _load()
+
+
+def bucket(experiment, game_id):
+    # Uniform in [0, 1), stable for a given experiment and game
+    digest = hashlib.sha256(f"{experiment}:{game_id}".encode()).digest()
+    return int.from_bytes(digest[:8], "big") / 2**64
+
+
+def assign(scenario, game_id):
+    # ((experiment, variant), ...) for this game, in declaration order
+    arms = []
+    for experiment, variants in scenario.experiments:
+        variant = variants[int(bucket(experiment, game_id) * len(variants))][0]
+        arms.append((experiment, variant))
+    return tuple(arms)
+
+
+@lru_cache(maxsize=256)
+def variant_scenario(scenario, arms):
+    # The scenario with the overrides of the given variants applied. Its
+    # version names the variants, so derived caches keep variants apart.
+    overrides = {}
+    for experiment, variants in scenario.experiments:
+        overrides.update(dict(variants)[dict(arms)[experiment]])
+    version = scenario.version + "".join(f"~{experiment}={variant}" for experiment, variant in arms)
+    variant = dataclasses.replace(scenario, version=version, **overrides)
+    _arms[version] = arms
+    return variant
+
+
+def apply(scenario):
+    # This session's variant of `scenario` (the scenario itself if it has
+    # no experiments)
+    if not scenario.experiments:
+        return scenario
+    return variant_scenario(scenario, assign(scenario, session_store.current_game_id()))
+
+
+def reapply(scenario, arms):
+    # The variant named by "~<experiment>=<variant>" version tags, one per
+    # experiment of the scenario (see reports.py)
+    declared = dict(scenario.experiments)
+    if [experiment for experiment, _ in arms] != list(declared) or any(
+        variant not in dict(declared[experiment]) for experiment, variant in arms
+    ):
+        raise ValueError(f"{scenario.id} has no variant {arms}")
+    return variant_scenario(scenario, tuple(arms))
+
+
+def _empty():
+    return {"n": 0, "wins": 0, **{outcome: [0.0, 0.0] for outcome in OUTCOMES}}
+
+
+def _merge(entry, other):
+    # Fold the aggregates `other` into `entry` (parallel Welford)
+    if not other["n"]:
+        return
+    n = entry["n"] + other["n"]
+    for outcome in OUTCOMES:
+        mean, m2 = entry[outcome]
+        other_mean, other_m2 = other[outcome]
+        delta = other_mean - mean
+        entry[outcome] = [mean + delta * other["n"] / n, m2 + other_m2 + delta**2 * entry["n"] * other["n"] / n]
+    entry["n"] = n
+    entry["wins"] += other["wins"]
+
+
+def _load():
+    # experiment -> variant -> {"n", "wins", outcome: [mean, m2]}, over
+    # the files of every process
+    stats = {}
+    for path in sorted(glob.glob(os.path.join(STATS_DIR, "*.json"))):
+        try:
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            continue
+        for experiment, variants in data.items():
+            for variant, entry in variants.items():
+                _merge(stats.setdefault(experiment, {}).setdefault(variant, _empty()), entry)
+    return stats
+
+
+def _save():
+    # Caller holds _lock
+    path = os.path.join(STATS_DIR, f"{PROCESS_ID}.json")
+    os.makedirs(STATS_DIR, exist_ok=True)
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(_own, f)
+    os.replace(tmp, path)
+
+
+def record(scenario, game_data):
+    # Fold one finished game into the aggregates of its variants
+    arms = _arms.get(scenario.version)
+    if not arms:
+        return
+    summary = engine.summarize(scenario, game_data)
+    with _lock:
+        for experiment, variant in arms:
+            entry = _own.setdefault(experiment, {}).setdefault(variant, _empty())
+            entry["n"] += 1
+            entry["wins"] += bool(summary["Target Met"])
+            for outcome in OUTCOMES:
+                # Welford: running mean and sum of squared deviations
+                mean, m2 = entry[outcome]
+                delta = summary[outcome] - mean
+                mean += delta / entry["n"]
+                entry[outcome] = [mean, m2 + delta * (summary[outcome] - mean)]
+        _save()
+
+
+def compare(experiment, outcome="Total Reduction", control="control"):
+    # One row per variant, control first; the difference to the control
+    # comes with a normal-approximation 95% interval
+    variants = _load().get(experiment, {})
+    variants = dict(sorted(variants.items(), key=lambda item: (item[0] != control, item[0])))
+    rows = {}
+    for name, entry in variants.items():
+        n = entry["n"]
+        mean, m2 = entry[outcome]
+        rows[name] = {
+            "Games": n,
+            f"Mean {outcome}": round(mean, 2),
+            "Std": round(math.sqrt(m2 / (n - 1)), 2) if n > 1 else float("nan"),
+            "Target Met Rate": round(entry["wins"] / n, 3) if n else float("nan"),
+        }
+    table = pd.DataFrame.from_dict(rows, orient="index").rename_axis("Variant")
+    if len(table) > 1:
+        control = table.iloc[0]
+        se = ((table["Std"] ** 2 / table["Games"]) + (control["Std"] ** 2 / control["Games"])) ** 0.5
+        table["Diff vs Control"] = (table[f"Mean {outcome}"] - control[f"Mean {outcome}"]).round(2)
+        table["95% CI"] = [
+            "" if i == 0 else f"±{1.96 * value:.2f}" for i, value in enumerate(se)
+        ]
+    return table
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare the variants of an experiment.")
+    parser.add_argument("experiment")
+    parser.add_argument("--outcome", choices=OUTCOMES, default="Total Reduction")
+    parser.add_argument("--control", default="control")
+    args = parser.parse_args()
+    print(compare(args.experiment, args.outcome, args.control).to_string())
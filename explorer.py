@@ -0,0 +1,173 @@
+import io
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+from matplotlib.figure import Figure
+
+import tables
+
+# ------------------------------
+# 🧭 Plan-Space Explorer
+# ------------------------------
+# For short horizons every plan can be played: a plan is one row of the
+# selections table (see tables.py; each row lists the picked initiatives)
+# per year. Only a plan's total reduction and cost matter, and many plans
+# share them, so the years are combined as weighted outcomes: the distinct
+# (total, cost) pairs of the years so far, each with its number of plans,
+# broadcast against the distinct pairs of one year and merged again. The
+# last year is broadcast in chunks straight into a 2-D count grid plus four
+# exact region counts (target met or not x within budget or not). The
+# results are shared tables, so each scenario version and horizon is
+# enumerated once.
+
+MAX_YEARS = 4  # 92 selections per year: 72M plans at 4 years, 6.6G at 5
+MAX_PLANS = 100_000_000  # Larger catalogs are not enumerated
+CHUNK = 1 << 20  # Outcomes per vectorized step
+DECIMALS = 12  # Totals are rounded to this many places before merging, dropping float noise
+REDUCTION_BIN = 1.0  # Grid cell size, in metric points
+COST_BIN = 1.0  # and in $M
+EPS = 1e-9
+REGION_DTYPE = np.dtype([
+    ("met_within_budget", "<i8"), ("met_over_budget", "<i8"),
+    ("missed_within_budget", "<i8"), ("missed_over_budget", "<i8"),
+    ("best_within_budget", "<f8"),  # Largest reduction of a plan within budget
+])
+
+
+def plan_count(scenario, years):
+    return tables.selection_count(scenario) ** years
+
+
+def _edges(scenario, years):
+    rows = tables.selections(scenario)
+    high = years * max(float(rows["reduction"].max()), 0.0)
+    low = years * min(float(rows["reduction"].min()), 0.0)
+    reduction_edges = np.arange(np.floor(low), np.ceil(high) + REDUCTION_BIN, REDUCTION_BIN)
+    cost_edges = np.arange(0.0, years * float(rows["cost"].max()) + COST_BIN, COST_BIN)
+    return reduction_edges, cost_edges
+
+
+def _distinct(step, cost, plans):
+    # The distinct (step, cost) pairs with the number of plans of each
+    pairs, inverse = np.unique(np.round(np.stack([step, cost], axis=1), DECIMALS), axis=0, return_inverse=True)
+    return pairs[:, 0], pairs[:, 1], np.rint(np.bincount(inverse.ravel(), weights=plans)).astype(np.int64)
+
+
+def _combine(first, second):
+    # Every outcome of `first` followed by every outcome of `second`
+    (step, cost, plans), (year_step, year_cost, year_plans) = first, second
+    return (
+        (step[:, None] + year_step).ravel(),
+        (cost[:, None] + year_cost).ravel(),
+        (plans[:, None] * year_plans).ravel(),
+    )
+
+
+@lru_cache(maxsize=8)
+def _enumerate(scenario, years):
+    rows = tables.selections(scenario)
+    reduction_edges, cost_edges = _edges(scenario, years)
+    cells = (len(reduction_edges), len(cost_edges))
+    counts = np.zeros(cells[0] * cells[1])
+    region_counts = np.zeros(4)
+    regions = np.zeros(1, dtype=REGION_DTYPE)
+    best = -np.inf
+    compounding = scenario.reduction_model == "compounding"
+    with np.errstate(divide="ignore"):
+        # Per selection: what it adds to the plan total (log of the share
+        # of the level that is left, when reductions compound)
+        step = np.log(np.clip(1 - rows["reduction"] / 100, 0, None)) if compounding else np.array(rows["reduction"])
+    year = _distinct(step, np.array(rows["cost"]), np.ones(len(rows)))
+    so_far = (np.zeros(1), np.zeros(1), np.ones(1, dtype=np.int64))
+    for _ in range(years - 1):
+        so_far = _distinct(*_combine(so_far, year))
+
+    block = max(1, CHUNK // len(year[0]))
+    for start in range(0, len(so_far[0]), block):
+        total_step, total_cost, plans = _combine(tuple(a[start:start + block] for a in so_far), year)
+        if compounding:
+            reduction = scenario.starting_level * (1 - np.exp(total_step))
+        else:
+            reduction = total_step
+        # Rounded so that a total on a bin edge, e.g. exactly 43, is binned as such
+        reduction = np.round(reduction, DECIMALS - 3)
+        total_cost = np.round(total_cost, DECIMALS - 3)
+
+        met = reduction >= scenario.target - EPS
+        over = total_cost > scenario.budget + EPS
+        region_counts += np.bincount(2 * ~met + over, weights=plans, minlength=4)
+        if (~over).any():
+            best = max(best, float(reduction[~over].max()))
+
+        row = np.clip(((reduction - reduction_edges[0]) // REDUCTION_BIN).astype(np.int64), 0, cells[0] - 1)
+        column = np.clip((total_cost // COST_BIN).astype(np.int64), 0, cells[1] - 1)
+        counts += np.bincount(row * cells[1] + column, weights=plans, minlength=len(counts))
+    for name, count in zip(REGION_DTYPE.names[:4], region_counts):
+        regions[name] = round(count)
+    regions["best_within_budget"] = best
+    return np.rint(counts).astype(np.int64).reshape(cells), regions
+
+
+def outcomes(scenario, years):
+    # (plan counts per reduction x cost cell, region counts)
+    counts = tables.table(scenario, f"outcomes_{years}", lambda scenario: _enumerate(scenario, years)[0])
+    regions = tables.table(scenario, f"outcome_regions_{years}", lambda scenario: _enumerate(scenario, years)[1])
+    return counts, regions[0]
+
+
+@lru_cache(maxsize=32)
+def _heatmap(scenario, years):
+    counts, _ = outcomes(scenario, years)
+    reduction_edges, cost_edges = _edges(scenario, years)
+    fig = Figure(figsize=(8, 5))
+    ax = fig.subplots()
+    shown = np.ma.masked_equal(np.asarray(counts).T, 0)
+    image = ax.pcolormesh(
+        np.r_[reduction_edges, reduction_edges[-1] + REDUCTION_BIN],
+        np.r_[cost_edges, cost_edges[-1] + COST_BIN],
+        shown,
+        cmap="viridis",
+        norm="log",
+    )
+    fig.colorbar(image, ax=ax, label="Plans")
+    ax.axvline(scenario.target, color="r", linestyle="--", label="Target")
+    ax.axhline(scenario.budget, color="k", linestyle=":", label="Budget")
+    ax.set_xlabel(f"Total {scenario.metric}")
+    ax.set_ylabel("Total Cost ($M)")
+    ax.set_title(f"Every {years}-Year Plan")
+    ax.legend(loc="upper left")
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format="png", dpi=100)
+    return buffer.getvalue()
+
+
+@st.fragment
+def render(scenario, years):
+    st.header("🧭 Explore Every Plan")
+    if years > MAX_YEARS:
+        st.info(f"Every plan can be listed for up to {MAX_YEARS} years. Choose fewer years in the sidebar to explore them.")
+        return
+    if not tables.fits(scenario) or plan_count(scenario, years) > MAX_PLANS:
+        st.info(f"This catalog has too many possible {years}-year plans ({plan_count(scenario, years):,}) to list them all.")
+        return
+    if not st.toggle(f"Show the outcomes of all {plan_count(scenario, years):,} possible {years}-year plans", key="explore_plans"):
+        return
+
+    with st.spinner("Playing every plan..."):
+        counts, regions = outcomes(scenario, years)
+    total = plan_count(scenario, years)
+    met = int(regions["met_within_budget"])
+    st.markdown(
+        f"- **{met:,}** plans ({met / total:.2%}) meet the target within the budget\n"
+        f"- **{int(regions['met_over_budget']):,}** meet the target but overrun the budget\n"
+        f"- **{int(regions['missed_within_budget']) + int(regions['missed_over_budget']):,}** miss the target\n"
+        f"- Best within budget: **{regions['best_within_budget']:.1f}** {scenario.metric}"
+    )
+    st.image(_heatmap(scenario, years), width="stretch")
+
+    reduction_edges, _ = _edges(scenario, years)
+    histogram = pd.Series(np.asarray(counts).sum(axis=1), index=reduction_edges, name="Plans")
+    st.subheader(f"Plans by Total {scenario.metric}")
+    st.bar_chart(histogram[histogram > 0])
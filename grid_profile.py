@@ -0,0 +1,180 @@
+import dataclasses
+import hashlib
+import os
+import shutil
+import tempfile
+import threading
+from functools import lru_cache
+from types import MappingProxyType
+
+import numpy as np
+import pandas as pd
+
+# ------------------------------
+# ⚡ Energy Impacts from an Hourly Grid Profile
+# ------------------------------
+# Scenarios can mark energy initiatives with "grid_profile", e.g.
+#
+#   "grid_profile": {"Solar Panels": {"model": "solar", "saves": "emissions"}}
+#
+# When GAME_GRID_PROFILE names a CSV or Parquet file of hourly rows (one
+# year is 8760 rows; longer profiles cover several years) with columns
+#
+#   carbon_intensity   grid gCO2/kWh
+#   load               site consumption, kWh
+#   solar              PV output per kW installed (optional; a clear-sky
+#                      day shape is used without it)
+#
+# apply() replaces those initiatives' fixed impacts by the share of the
+# site's emissions (or load) they save over the profile. Without the
+# variable nothing changes.
+#
+# The file is read in chunks and written once, column by column, to
+# GAME_STATE_DIR/grid/<file signature>.npy, which every process then
+# memory-maps; savings are whole-array NumPy expressions over the hours.
+
+PROFILE_PATH = os.environ.get("GAME_GRID_PROFILE")
+CACHE_DIR = os.path.join(os.environ.get("GAME_STATE_DIR", ".game_state"), "grid")
+COLUMNS = ("carbon_intensity", "load", "solar")
+CHUNK_ROWS = 1 << 18
+
+SOLAR_SHARE = 0.15  # PV sized to produce this share of the site's yearly load
+MONITORING_CUT = 0.10  # Share of the load above base load that monitoring removes
+BASE_LOAD_PERCENTILE = 5
+
+_lock = threading.Lock()
+
+
+def _signature(path):
+    stat = os.stat(path)
+    key = f"{os.path.abspath(path)}:{stat.st_mtime_ns}:{stat.st_size}"
+    return hashlib.sha1(key.encode()).hexdigest()[:12]
+
+
+def _csv_chunks(path):
+    header = pd.read_csv(path, nrows=0).columns
+    usecols = [column for column in COLUMNS if column in header]
+    for chunk in pd.read_csv(path, usecols=usecols, dtype="float64", chunksize=CHUNK_ROWS):
+        yield chunk
+
+
+def _parquet_chunks(path):
+    try:
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ImportError("Parquet grid profiles need pyarrow (pip install pyarrow)")
+    source = pq.ParquetFile(path)
+    usecols = [column for column in COLUMNS if column in source.schema_arrow.names]
+    for batch in source.iter_batches(batch_size=CHUNK_ROWS, columns=usecols):
+        yield batch.to_pandas().astype("float64")
+
+
+def _clear_sky(start, hours):
+    # PV output per kW: a half sine between 6:00 and 18:00
+    hour_of_day = (start + np.arange(hours)) % 24
+    return np.clip(np.sin(np.pi * (hour_of_day - 6) / 12), 0, None)
+
+
+def _ingest(path, target):
+    # Stream the chunks into one raw file per column, then join them into
+    # a (columns, hours) .npy so each column is contiguous
+    chunks = _parquet_chunks(path) if path.endswith((".parquet", ".pq")) else _csv_chunks(path)
+    hours = 0
+    with tempfile.TemporaryDirectory(dir=os.path.dirname(target)) as scratch:
+        raw = {column: open(os.path.join(scratch, column), "wb") for column in COLUMNS}
+        try:
+            for chunk in chunks:
+                if "carbon_intensity" not in chunk or "load" not in chunk:
+                    raise ValueError(f"{path}: needs carbon_intensity and load columns")
+                solar = chunk["solar"].to_numpy() if "solar" in chunk else _clear_sky(hours, len(chunk))
+                raw["carbon_intensity"].write(chunk["carbon_intensity"].to_numpy().tobytes())
+                raw["load"].write(chunk["load"].to_numpy().tobytes())
+                raw["solar"].write(np.ascontiguousarray(solar, dtype="float64").tobytes())
+                hours += len(chunk)
+        finally:
+            for f in raw.values():
+                f.close()
+        tmp = os.path.join(scratch, "profile.npy")
+        with open(tmp, "wb") as out:
+            np.lib.format.write_array_header_1_0(out, {"descr": "<f8", "fortran_order": False, "shape": (len(COLUMNS), hours)})
+            for column in COLUMNS:
+                with open(os.path.join(scratch, column), "rb") as f:
+                    shutil.copyfileobj(f, out, 1 << 20)
+        os.replace(tmp, target)
+
+
+def load(path=None):
+    # (columns, hours) read-only array for the profile file, or None
+    path = path or PROFILE_PATH
+    if not path:
+        return None
+    return _load(path, _signature(path))
+
+
+@lru_cache(maxsize=8)
+def _load(path, signature):
+    target = os.path.join(CACHE_DIR, f"{signature}.npy")
+    with _lock:
+        if not os.path.exists(target):
+            os.makedirs(CACHE_DIR, exist_ok=True)
+            _ingest(path, target)
+    return np.load(target, mmap_mode="r")
+
+
+# ------------------------------
+# 🧮 Savings over the Hourly Axis
+# ------------------------------
+# Each model returns the saved load per hour; savings are reported as a
+# percentage of the site's total load or of its total emissions.
+
+
+def _solar(intensity, load, solar):
+    capacity = SOLAR_SHARE * load.sum() / solar.sum()
+    return np.minimum(capacity * solar, load)  # Only what the site uses itself
+
+
+def _monitoring(intensity, load, solar):
+    base = np.percentile(load, BASE_LOAD_PERCENTILE)
+    return MONITORING_CUT * np.clip(load - base, 0, None)
+
+
+MODELS = {"solar": _solar, "monitoring": _monitoring}
+
+
+def savings(profile, model, saves):
+    intensity, load, solar = (np.asarray(column) for column in profile)
+    saved = MODELS[model](intensity, load, solar)
+    if saves == "load":
+        return float(100 * saved.sum() / load.sum())
+    return float(100 * (saved @ intensity) / (load @ intensity))
+
+
+@lru_cache(maxsize=64)
+def _derived(scenario, path, signature):
+    profile = _load(path, signature)
+    initiatives = dict(scenario.initiatives)
+    for name, model, saves in scenario.grid_profile:
+        attrs = dict(initiatives[name])
+        attrs[scenario.metric] = round(savings(profile, model, saves), 1)
+        initiatives[name] = MappingProxyType(attrs)
+    return dataclasses.replace(
+        scenario,
+        version=f"{scenario.version}~grid={signature}",
+        initiatives=MappingProxyType(initiatives),
+    )
+
+
+def apply(scenario):
+    # `scenario` with its grid-profile initiatives derived from
+    # GAME_GRID_PROFILE, or unchanged when it is not set
+    if not scenario.grid_profile or not PROFILE_PATH:
+        return scenario
+    return _derived(scenario, PROFILE_PATH, _signature(PROFILE_PATH))
+
+
+def reapply(scenario, signature):
+    # The variant a "~grid=<signature>" version tag names (see reports.py);
+    # only the profile file GAME_GRID_PROFILE names now can rebuild it
+    if not scenario.grid_profile or not PROFILE_PATH or _signature(PROFILE_PATH) != signature:
+        raise ValueError(f"grid profile {signature} is not GAME_GRID_PROFILE")
+    return _derived(scenario, PROFILE_PATH, signature)
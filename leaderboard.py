@@ -0,0 +1,165 @@
+import glob
+import json
+import os
+import threading
+import time
+import uuid
+from bisect import bisect_left, insort
+from collections import Counter
+from dataclasses import dataclass, field
+
+import streamlit as st
+
+import session_store
+
+# ------------------------------
+# 🏆 Live Leaderboard
+# ------------------------------
+# Scoring apps call submit() when a game's last year is confirmed (again
+# when a finished game revises a year). Each app runs as its own server
+# process, so every process appends one JSON line per score to
+# GAME_STATE_DIR/leaderboard/<app>/<process>.jsonl, and the viewer (21app)
+# reads each log from where it stopped last time. Each board (one per app)
+# folds in only those new lines, keeping its aggregates up to date entry by
+# entry and replacing a game's older entry:
+#
+#   - a sorted ranking of (-score, game id), so the top N is a slice
+#   - a score histogram in 10-point bins
+#   - per-initiative popularity (games that picked it at least once)
+#
+# Viewers call snapshot(), which hands every viewer the same prepared dict
+# and rebuilds it at most once per GAME_LEADERBOARD_REFRESH seconds
+# (default 2), and only if something was submitted in the meantime.
+
+REFRESH_SECONDS = float(os.environ.get("GAME_LEADERBOARD_REFRESH", "2"))
+BOARD_DIR = os.path.join(session_store.STATE_DIR, "leaderboard")
+PROCESS_ID = uuid.uuid4().hex  # File name of this process's log
+TOP_N = 10
+BIN_WIDTH = 10
+BINS = 100 // BIN_WIDTH
+
+
+@dataclass
+class Board:
+    title: str = ""
+    lock: threading.Lock = field(default_factory=threading.Lock)
+    entries: dict = field(default_factory=dict)  # game id -> (score, name, initiatives picked, submitted at)
+    ranking: list = field(default_factory=list)  # sorted (-score, game id)
+    histogram: list = field(default_factory=lambda: [0] * BINS)
+    popularity: Counter = field(default_factory=Counter)
+    offsets: dict = field(default_factory=dict)  # log path -> bytes folded in so far
+    checked_at: float = 0.0
+    changed: bool = True
+    snapshot: dict = None
+    snapshot_at: float = 0.0
+
+
+_lock = threading.Lock()
+_sent = {}  # (app, game id) -> (score, name, picked) last appended by this process
+_boards = {}  # app -> Board merged from every process's log
+
+
+def _bin(score):
+    return min(max(int(score // BIN_WIDTH), 0), BINS - 1)
+
+
+def _path(app, owner=PROCESS_ID):
+    return os.path.join(BOARD_DIR, app, f"{owner}.jsonl")
+
+
+def submit(script, scenario, score, game_data):
+    app = os.path.splitext(os.path.basename(script))[0]
+    game_id = st.session_state.game_id
+    name = st.session_state.get("player_name") or f"Player {game_id[:4]}"
+    picked = sorted({initiative for chosen in game_data["Chosen Initiatives"] for initiative in chosen})
+    score = round(float(score), 1)
+
+    with _lock:
+        if _sent.get((app, game_id)) == (score, name, picked):
+            return  # Same score submitted again
+        _sent[(app, game_id)] = (score, name, picked)
+        path = _path(app)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        line = json.dumps([game_id, score, name, picked, time.time(), scenario.title], separators=(",", ":"))
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(line + "\n")  # One write per line, so readers never see half of one
+
+
+def _apply(board, game_id, entry):
+    # Caller holds board.lock. The newest entry of a game wins, whichever
+    # process it came from.
+    old = board.entries.get(game_id)
+    if old is not None:
+        if old[3] >= entry[3]:
+            return
+        del board.ranking[bisect_left(board.ranking, (-old[0], game_id))]
+        board.histogram[_bin(old[0])] -= 1
+        board.popularity.subtract(old[2])
+    board.entries[game_id] = entry
+    insort(board.ranking, (-entry[0], game_id))
+    board.histogram[_bin(entry[0])] += 1
+    board.popularity.update(entry[2])
+    board.changed = True
+
+
+def _refresh(app):
+    # The app's board with the lines appended to every process log since
+    # the last look folded in, looked at most every REFRESH_SECONDS
+    with _lock:
+        board = _boards.setdefault(app, Board())
+    now = time.time()
+    if now - board.checked_at < REFRESH_SECONDS:
+        return board
+    with board.lock:
+        if now - board.checked_at >= REFRESH_SECONDS:
+            for path in glob.glob(os.path.join(BOARD_DIR, app, "*.jsonl")):
+                offset = board.offsets.get(path, 0)
+                try:
+                    if os.path.getsize(path) == offset:
+                        continue
+                    with open(path, "rb") as f:
+                        f.seek(offset)
+                        data = f.read()
+                except OSError:
+                    continue
+                complete = data[: data.rfind(b"\n") + 1]  # A line still being written is read next time
+                for line in complete.splitlines():
+                    try:
+                        game_id, score, name, picked, submitted_at, title = json.loads(line)
+                    except ValueError:
+                        continue
+                    board.title = title
+                    _apply(board, game_id, (score, name, frozenset(picked), submitted_at))
+                board.offsets[path] = offset + len(complete)
+            board.checked_at = now
+    return board
+
+
+def boards():
+    # app -> board title, for every app with submitted scores
+    apps = sorted(os.path.basename(path) for path in glob.glob(os.path.join(BOARD_DIR, "*")) if os.path.isdir(path))
+    titles = {app: _refresh(app).title for app in apps}
+    return {app: title for app, title in titles.items() if title}
+
+
+def snapshot(app):
+    board = _refresh(app)
+    now = time.time()
+    if board.snapshot is not None and (now - board.snapshot_at < REFRESH_SECONDS or not board.changed):
+        return board.snapshot
+
+    with board.lock:
+        if board.snapshot is None or (now - board.snapshot_at >= REFRESH_SECONDS and board.changed):
+            board.snapshot = {
+                "players": len(board.entries),
+                "top": [
+                    {"Rank": rank, "Player": board.entries[game_id][1], "Score": -negative_score}
+                    for rank, (negative_score, game_id) in enumerate(board.ranking[:TOP_N], start=1)
+                ],
+                "histogram": {f"{low}-{low + BIN_WIDTH}": count for low, count in zip(range(0, 100, BIN_WIDTH), board.histogram)},
+                "popularity": dict(sorted(((name, count) for name, count in board.popularity.items() if count > 0), key=lambda item: -item[1])),
+                "updated": now,
+            }
+            board.snapshot_at = now
+            board.changed = False
+        return board.snapshot
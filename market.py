@@ -0,0 +1,170 @@
+import os
+import random
+import threading
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+
+import engine
+import metrics
+import scenarios
+import synergy
+
+# ------------------------------
+# 🏪 Market Mode: Firms Competing for Shared Pools
+# ------------------------------
+# Many firms play the same scenario in a room. Some initiatives draw on a
+# shared pool (scenario "pools") that can serve only a share of the firms
+# each year. Every firm submits its year; when all have submitted (or the
+# host closes the year) the whole room is resolved in one step:
+#
+#   - submissions become one (firms x initiatives) 0/1 matrix
+#   - for each oversubscribed pool a lottery (seeded per room and year)
+#     keeps the requests of `share * firms` random requesters; the others
+#     lose that initiative and do not pay for it
+#   - reductions and costs for every firm come from synergy.evaluate()
+#
+# Rooms live in memory for the length of a workshop.
+#
+#   GAME_MARKET_POLL  seconds between room status checks (default 2)
+
+POLL_SECONDS = float(os.environ.get("GAME_MARKET_POLL", "2"))
+
+
+@dataclass
+class Room:
+    scenario_id: str
+    years: int
+    host: str
+    seed: int = field(default_factory=lambda: random.getrandbits(32))
+    lock: threading.Lock = field(default_factory=threading.Lock)
+    version: int = 0  # Bumped on every join, submission and resolution
+    year: int = 1  # Year being collected; years + 1 once the game is over
+    firms: dict = field(default_factory=dict)  # firm -> game_data
+    submissions: dict = field(default_factory=dict)  # firm -> initiatives for `year`
+    lost: dict = field(default_factory=dict)  # (year, firm) -> initiatives lost in a lottery
+
+    @property
+    def scenario(self):
+        return scenarios.load(self.scenario_id)
+
+    @property
+    def finished(self):
+        return self.year > self.years
+
+
+_lock = threading.Lock()
+_rooms = {}  # room code -> Room
+
+
+def room_code(text):
+    return "".join(c for c in text.upper() if c.isalnum())[:12]
+
+
+def get_room(code):
+    return _rooms.get(code)
+
+
+def open_room(code, scenario_id, years, host):
+    with _lock:
+        room = _rooms.get(code)
+        if room is None:
+            room = _rooms[code] = Room(scenario_id=scenario_id, years=years, host=host)
+        count = len(_rooms)
+    metrics.set_gauge("game_market_rooms", count)
+    return room
+
+
+def join(room, firm):
+    with room.lock:
+        if firm not in room.firms:
+            room.firms[firm] = engine.new_game(room.scenario)
+            room.version += 1
+
+
+def ledger(room, firm):
+    # A copy of the firm's game_data, safe to read while the room resolves
+    with room.lock:
+        return {column: list(values) for column, values in room.firms[firm].items()}
+
+
+def submit(room, firm, chosen):
+    # Raises ValueError with a message for the player if the submission is
+    # not allowed; resolves the year when this was the last firm missing
+    scenario = room.scenario
+    with room.lock:
+        if room.finished:
+            raise ValueError("The game in this room is over.")
+        if len(chosen) > scenario.max_selections:
+            raise ValueError(f"Select at most {scenario.max_selections} initiatives.")
+        game_data = room.firms[firm]
+        remaining_budget = game_data["Remaining Budget"][-1] if game_data["Remaining Budget"] else scenario.budget
+        if engine.year_effect(scenario, chosen)[1] > remaining_budget:
+            raise ValueError("⚠️ Not enough budget to implement these initiatives. Please adjust your choices.")
+        room.submissions[firm] = list(chosen)
+        room.version += 1
+        if len(room.submissions) == len(room.firms):
+            _resolve(room)
+
+
+def close_year(room):
+    # Host action: resolve now; firms that have not submitted pick nothing
+    with room.lock:
+        if not room.finished:
+            _resolve(room)
+
+
+def allocate(scenario, X, rng):
+    # Grants for a (firms x initiatives) request matrix: for each pool that
+    # more firms want than it can serve, a random subset keeps its request
+    granted = np.array(X, order="F")
+    firms = granted.shape[0]
+    index = synergy.columns(scenario)
+    for _, share, members in scenario.pools:
+        columns = [index[name] for name in members]
+        wants = granted[:, columns].any(axis=1)
+        capacity = max(1, int(share * firms))
+        if wants.sum() <= capacity:
+            continue
+        priority = np.where(wants, rng.random(firms), -1.0)
+        winners = np.argpartition(-priority, capacity - 1)[:capacity]
+        losers = wants.copy()
+        losers[winners] = False
+        granted[np.ix_(losers, columns)] = 0
+    return granted
+
+
+def _resolve(room):
+    # Caller holds room.lock
+    scenario = room.scenario
+    firms = list(room.firms)
+    requested = [room.submissions.get(firm, []) for firm in firms]
+    X = synergy.selection_matrix(scenario, requested)
+    granted = allocate(scenario, X, np.random.default_rng([room.seed, room.year]))
+    reductions, costs = synergy.evaluate(scenario, granted)
+    index = synergy.columns(scenario)
+
+    for row, firm in enumerate(firms):
+        kept = [name for name in requested[row] if granted[row, index[name]]]
+        if len(kept) < len(requested[row]):
+            room.lost[(room.year, firm)] = [name for name in requested[row] if name not in kept]
+        game_data = room.firms[firm]
+        remaining_budget = game_data["Remaining Budget"][-1] if game_data["Remaining Budget"] else scenario.budget
+        game_data["Year"].append(room.year)
+        game_data["Chosen Initiatives"].append(kept)
+        game_data[scenario.metric].append(float(reductions[row]))
+        game_data["Total Cost"].append(round(float(costs[row]), 2))
+        game_data["Remaining Budget"].append(round(remaining_budget - float(costs[row]), 2))
+
+    room.submissions = {}
+    room.year += 1
+    room.version += 1
+
+
+def standings(room):
+    scenario = room.scenario
+    with room.lock:
+        rows = {firm: engine.summarize(scenario, game_data) for firm, game_data in room.firms.items()}
+    table = pd.DataFrame.from_dict(rows, orient="index").rename_axis("Firm")
+    return table.sort_values("Total Reduction", ascending=False)
@@ -0,0 +1,255 @@
+import logging
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from logging.handlers import RotatingFileHandler
+
+# ------------------------------
+# ⏱️ Rerun Phase Instrumentation
+# ------------------------------
+# Every rerun of an instrumented app calls begin_rerun(), then lap("<phase>")
+# at each phase boundary and end_rerun() at the bottom. Only perf_counter()
+# calls and a few dict updates happen on the rerun path, so it can stay on.
+# Functions under @st.fragment also take @metrics.fragment(__file__), which
+# times their own reruns (the rest of the script does not run then).
+#
+# Export (both optional, read once per process):
+#   GAME_METRICS_PORT      serve Prometheus text on http://127.0.0.1:<port>/metrics
+#   GAME_METRICS_FILE      write the same text to a rotating file
+#   GAME_METRICS_INTERVAL  seconds between file snapshots (default 30)
+
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+SESSION_WINDOW = 300  # A session counts as active for 5 minutes after its last rerun
+
+log = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_local = threading.local()
+_histograms = {}  # (app, phase) -> [bucket counts..., count, sum]
+_gauges = {}  # (name, app) -> value
+_sessions = {}  # session id -> time of last rerun
+_exporters_started = False
+
+
+def _script_run_ctx():
+    try:
+        from streamlit.runtime.scriptrunner import get_script_run_ctx
+    except ImportError:
+        return None
+    return get_script_run_ctx()
+
+
+def _session_id():
+    ctx = _script_run_ctx()
+    return ctx.session_id if ctx is not None else None
+
+
+def _app_name(script):
+    return os.path.splitext(os.path.basename(script))[0]
+
+
+def _observe(app, phase, seconds):
+    with _lock:
+        hist = _histograms.get((app, phase))
+        if hist is None:
+            hist = _histograms[(app, phase)] = [0] * (len(BUCKETS) + 2)
+        for i, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                hist[i] += 1
+        hist[-2] += 1
+        hist[-1] += seconds
+
+
+def begin_rerun(script):
+    _start_exporters()
+    now = time.perf_counter()
+    _local.app = _app_name(script)
+    _local.started = now
+    _local.last = now
+    session_id = _session_id()
+    if session_id is not None:
+        _sessions[session_id] = time.time()
+
+
+def lap(phase):
+    # Time since the previous lap (or begin_rerun) is booked under `phase`
+    app = getattr(_local, "app", None)
+    if app is None:
+        return
+    now = time.perf_counter()
+    _observe(app, phase, now - _local.last)
+    _local.last = now
+
+
+@contextmanager
+def phase(name):
+    # Times a nested block (e.g. confirm handling inside the year loop)
+    # without moving the lap marker of the enclosing phase.
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        app = getattr(_local, "app", None)
+        if app is not None:
+            _observe(app, name, time.perf_counter() - started)
+
+
+def fragment(script):
+    # Decorator for st.fragment functions. On a fragment-only rerun
+    # begin_rerun() is not called, so the call is timed here as a "fragment"
+    # phase and phase() blocks inside it are booked under the app.
+    app = _app_name(script)
+
+    def decorate(func):
+        @wraps(func)
+        def run(*args, **kwargs):
+            ctx = _script_run_ctx()
+            if ctx is None or not ctx.fragment_ids_this_run:
+                return func(*args, **kwargs)  # Part of a full rerun
+            _local.app = app
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                _observe(app, "fragment", time.perf_counter() - started)
+                _local.app = None
+
+        return run
+
+    return decorate
+
+
+def set_gauge(name, value, app=None):
+    with _lock:
+        _gauges[(name, app)] = value
+
+
+def _session_state_size(session_state):
+    # Keys plus the entries of any list/dict values one level down (the
+    # game ledgers), which is what grows with play.
+    size = 0
+    for value in session_state.values():
+        size += 1
+        if isinstance(value, dict):
+            size += sum(len(v) if isinstance(v, (list, dict)) else 1 for v in value.values())
+        elif isinstance(value, list):
+            size += len(value)
+    return size
+
+
+def end_rerun(session_state=None):
+    app = getattr(_local, "app", None)
+    if app is None:
+        return
+    now = time.perf_counter()
+    _observe(app, "rerun", now - _local.started)
+    _local.app = None
+
+    cutoff = time.time() - SESSION_WINDOW
+    with _lock:
+        if session_state is not None:
+            _gauges[("game_session_state_keys", app)] = len(session_state)
+            _gauges[("game_session_state_items", app)] = _session_state_size(session_state)
+        pyplot = sys.modules.get("matplotlib.pyplot")
+        if pyplot is not None:
+            _gauges[("game_open_figures", None)] = len(pyplot.get_fignums())
+        for session_id, seen in list(_sessions.items()):
+            if seen < cutoff:
+                del _sessions[session_id]
+        _gauges[("game_active_sessions", None)] = len(_sessions)
+
+
+def _labels(**labels):
+    parts = [f'{key}="{value}"' for key, value in labels.items() if value is not None]
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def render():
+    # Prometheus text exposition format (version 0.0.4)
+    with _lock:
+        histograms = {key: list(value) for key, value in _histograms.items()}
+        gauges = dict(_gauges)
+
+    lines = [
+        "# HELP game_phase_seconds Wall time spent in each phase of a rerun.",
+        "# TYPE game_phase_seconds histogram",
+    ]
+    for (app, phase_name), hist in sorted(histograms.items()):
+        for bound, count in zip(BUCKETS, hist):
+            lines.append(f"game_phase_seconds_bucket{_labels(app=app, phase=phase_name, le=bound)} {count}")
+        lines.append(f"game_phase_seconds_bucket{_labels(app=app, phase=phase_name, le='+Inf')} {hist[-2]}")
+        lines.append(f"game_phase_seconds_sum{_labels(app=app, phase=phase_name)} {hist[-1]:.6f}")
+        lines.append(f"game_phase_seconds_count{_labels(app=app, phase=phase_name)} {hist[-2]}")
+
+    for name in sorted({name for name, _ in gauges}):
+        lines.append(f"# TYPE {name} gauge")
+        for (gauge, app), value in sorted(gauges.items(), key=lambda item: item[0][1] or ""):
+            if gauge == name:
+                lines.append(f"{name}{_labels(app=app)} {value}")
+    return "\n".join(lines) + "\n"
+
+
+# ------------------------------
+# 📤 Exporters
+# ------------------------------
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = render().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def _serve(port):
+    try:
+        server = ThreadingHTTPServer(("127.0.0.1", port), _MetricsHandler)
+    except OSError as exc:
+        # Another worker process on this host already owns the port
+        log.warning("Metrics endpoint not started on port %s: %s", port, exc)
+        return
+    threading.Thread(target=server.serve_forever, name="game-metrics-http", daemon=True).start()
+
+
+def _write_snapshots(path, interval):
+    writer = logging.getLogger(f"{__name__}.file")
+    writer.propagate = False
+    handler = RotatingFileHandler(path, maxBytes=5 * 1024 * 1024, backupCount=3)
+    handler.setFormatter(logging.Formatter("# %(asctime)s pid=%(process)d\n%(message)s"))
+    writer.addHandler(handler)
+    writer.setLevel(logging.INFO)
+
+    def loop():
+        while True:
+            time.sleep(interval)
+            writer.info(render())
+
+    threading.Thread(target=loop, name="game-metrics-file", daemon=True).start()
+
+
+def _start_exporters():
+    global _exporters_started
+    if _exporters_started:
+        return
+    with _lock:
+        if _exporters_started:
+            return
+        _exporters_started = True
+    port = os.environ.get("GAME_METRICS_PORT")
+    if port:
+        _serve(int(port))
+    path = os.environ.get("GAME_METRICS_FILE")
+    if path:
+        _write_snapshots(path, float(os.environ.get("GAME_METRICS_INTERVAL", "30")))
@@ -0,0 +1,283 @@
+import argparse
+import glob
+import json
+import os
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field, replace
+
+import numpy as np
+
+import session_store
+
+# ------------------------------
+# 📈 Percentile Ranking ("you beat 73% of players")
+# ------------------------------
+# Finished games add their final score to a t-digest per (scenario, scoring
+# rule): at most a few hundred weighted centroids, however many games were
+# played, with the rank error smallest near the top and bottom. Each server
+# process writes its own digest to
+# GAME_STATE_DIR/percentiles/<sketch>/<process>.json when BUFFER_SIZE new
+# scores have been merged in, and otherwise every GAME_PERCENTILE_REFRESH
+# seconds (default 10) from a background thread. Rank queries use this
+# process's digest, buffer included, merged with the files of the others
+# (re-read at most every GAME_PERCENTILE_REFRESH seconds): one binary search
+# over the centroids.
+#
+#   python percentiles.py              # games and quartiles per sketch
+#   python percentiles.py --compact    # fold the process files together (servers stopped)
+
+COMPRESSION = 100  # About this many centroids are kept; higher is more accurate
+BUFFER_SIZE = 200  # New scores collected before they are merged in
+REFRESH_SECONDS = float(os.environ.get("GAME_PERCENTILE_REFRESH", "10"))
+SKETCH_DIR = os.path.join(session_store.STATE_DIR, "percentiles")
+PROCESS_ID = uuid.uuid4().hex  # File name of this process's digests
+
+
+@dataclass
+class Digest:
+    means: np.ndarray = field(default_factory=lambda: np.empty(0))
+    weights: np.ndarray = field(default_factory=lambda: np.empty(0))
+    below: np.ndarray = field(default_factory=lambda: np.empty(0))  # Weight before each centroid's midpoint
+    buffer: list = field(default_factory=list)
+    low: float = float("inf")
+    high: float = float("-inf")
+
+
+_lock = threading.Lock()
+_own = {}  # sketch -> Digest of the games finished in this process
+_unsaved = set()  # Sketches whose own digest has games not yet in its file
+_merged = {}  # sketch -> [checked at, ({path: mtime} of other processes, own games), Digest of all processes]
+_flusher_started = False
+
+
+def sketch_name(scenario, rule=None):
+    return f"{scenario.id}.{rule or scenario.scoring}"
+
+
+def _limit(q):
+    # Largest quantile the centroid starting at q may reach (k1 scale
+    # function, so centroids are small near q = 0 and q = 1)
+    k = COMPRESSION / (2 * np.pi) * np.arcsin(2 * q - 1) + 1
+    return (np.sin(min(k, COMPRESSION / 4) * 2 * np.pi / COMPRESSION) + 1) / 2
+
+
+def _cluster(digest, means, weights):
+    # Replace the centroids by the weighted points clustered left to right
+    order = np.argsort(means, kind="stable")
+    means, weights = means[order], weights[order]
+    total = weights.sum()
+    merged_means, merged_weights = [means[0]], [weights[0]]
+    done = 0.0  # Weight of the closed centroids
+    limit = total * _limit(0.0)
+    for mean, weight in zip(means[1:], weights[1:]):
+        if done + merged_weights[-1] + weight <= limit:
+            merged_weights[-1] += weight
+            merged_means[-1] += (mean - merged_means[-1]) * weight / merged_weights[-1]
+        else:
+            done += merged_weights[-1]
+            limit = total * _limit(done / total)
+            merged_means.append(mean)
+            merged_weights.append(weight)
+    digest.means = np.array(merged_means)
+    digest.weights = np.array(merged_weights)
+    digest.below = np.cumsum(digest.weights) - digest.weights / 2
+    return digest
+
+
+def _compress(digest):
+    if digest.buffer:
+        digest.low = min(digest.low, min(digest.buffer))
+        digest.high = max(digest.high, max(digest.buffer))
+        _cluster(
+            digest,
+            np.concatenate([digest.means, digest.buffer]),
+            np.concatenate([digest.weights, np.ones(len(digest.buffer))]),
+        )
+        digest.buffer = []
+    return digest
+
+
+def add(digest, score):
+    digest.buffer.append(float(score))
+    if len(digest.buffer) >= BUFFER_SIZE:
+        _compress(digest)
+
+
+def merge(digests):
+    merged = Digest()
+    digests = [_compress(digest) for digest in digests if len(digest.weights) or digest.buffer]
+    if digests:
+        merged.low = min(digest.low for digest in digests)
+        merged.high = max(digest.high for digest in digests)
+        _cluster(
+            merged,
+            np.concatenate([digest.means for digest in digests]),
+            np.concatenate([digest.weights for digest in digests]),
+        )
+    return merged
+
+
+def count(digest):
+    return float(digest.weights.sum()) + len(digest.buffer)
+
+
+def rank(digest, score):
+    # Approximate share of games that scored below `score`, in [0, 1]
+    _compress(digest)
+    total = count(digest)
+    if not total or score <= digest.low:
+        return 0.0
+    if score > digest.high:
+        return 1.0
+    # Interpolate between the neighbouring centroid midpoints; past the
+    # outer centroids, towards the lowest and highest score seen
+    i = int(np.searchsorted(digest.means, score))
+    left_mean, left_rank = (digest.means[i - 1], digest.below[i - 1]) if i > 0 else (digest.low, 0.0)
+    right_mean, right_rank = (digest.means[i], digest.below[i]) if i < len(digest.means) else (digest.high, total)
+    if right_mean <= left_mean:
+        return float(left_rank / total)
+    share = (score - left_mean) / (right_mean - left_mean)
+    return float((left_rank + share * (right_rank - left_rank)) / total)
+
+
+def quantile(digest, q):
+    # Inverse of rank(): the score with a share q of games below it
+    _compress(digest)
+    total = count(digest)
+    if not total:
+        return float("nan")
+    points = np.concatenate([[0.0], digest.below, [total]])
+    scores = np.concatenate([[digest.low], digest.means, [digest.high]])
+    return float(np.interp(q * total, points, scores))
+
+
+# ------------------------------
+# 💾 One File per Process
+# ------------------------------
+
+
+def _path(sketch, owner=PROCESS_ID):
+    return os.path.join(SKETCH_DIR, sketch, f"{owner}.json")
+
+
+def _write(path, digest):
+    _compress(digest)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(
+            {"means": digest.means.tolist(), "weights": digest.weights.tolist(), "low": digest.low, "high": digest.high},
+            f,
+        )
+    os.replace(tmp, path)
+
+
+def _read(path):
+    try:
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return Digest()
+    digest = Digest(np.array(data["means"]), np.array(data["weights"]), low=data["low"], high=data["high"])
+    digest.below = np.cumsum(digest.weights) - digest.weights / 2
+    return digest
+
+
+def _start_flusher():
+    global _flusher_started
+    with _lock:
+        if _flusher_started:
+            return
+        _flusher_started = True
+
+    def loop():
+        while True:
+            time.sleep(REFRESH_SECONDS)
+            flush()
+
+    threading.Thread(target=loop, name="percentile-flusher", daemon=True).start()
+
+
+def flush():
+    # Write the digests with unsaved games, e.g. before a planned restart
+    with _lock:
+        for sketch in _unsaved:
+            _write(_path(sketch), _own[sketch])
+        _unsaved.clear()
+
+
+def record(sketch, score):
+    # A finished game's final score; call once per game. Written out when
+    # the buffer is merged in, or by the next flush().
+    _start_flusher()
+    with _lock:
+        digest = _own.setdefault(sketch, Digest())
+        add(digest, score)
+        if digest.buffer:
+            _unsaved.add(sketch)
+        else:
+            _write(_path(sketch), digest)
+            _unsaved.discard(sketch)
+        if sketch in _merged:
+            _merged[sketch][0] = 0.0  # Include this game in the next query
+
+
+def merged(sketch):
+    # Digest of every process's games, refreshed at most every REFRESH_SECONDS
+    now = time.time()
+    entry = _merged.get(sketch)
+    if entry is not None and now - entry[0] < REFRESH_SECONDS:
+        return entry[2]
+    with _lock:
+        entry = _merged.get(sketch)
+        if entry is None or now - entry[0] >= REFRESH_SECONDS:
+            files = {}
+            for path in glob.glob(os.path.join(SKETCH_DIR, sketch, "*.json")):
+                try:
+                    if path != _path(sketch):
+                        files[path] = os.stat(path).st_mtime_ns
+                except OSError:
+                    pass
+            own = _own.get(sketch, Digest())
+            seen = (files, count(own))
+            if entry is None or seen != entry[1]:
+                # A copy of this process's digest, so merging leaves its buffer alone
+                digests = [_read(path) for path in files] + [replace(own, buffer=list(own.buffer))]
+                entry = [now, seen, merge(digests)]
+            entry[0] = now
+            _merged[sketch] = entry
+        return entry[2]
+
+
+def beaten(sketch, score):
+    # (percentage of recorded games scoring below `score`, number of games)
+    digest = merged(sketch)
+    return round(100 * rank(digest, score)), int(count(digest))
+
+
+def compact(sketch):
+    # Fold every process file of a sketch into one. Only safe while no
+    # server is writing to it.
+    paths = glob.glob(os.path.join(SKETCH_DIR, sketch, "*.json"))
+    if len(paths) > 1:
+        _write(_path(sketch, f"compacted-{PROCESS_ID}"), merge([_read(path) for path in paths]))
+        for path in paths:
+            os.remove(path)
+
+
+def sketches():
+    return sorted(os.path.basename(path) for path in glob.glob(os.path.join(SKETCH_DIR, "*")) if os.path.isdir(path))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Show or compact the score percentile sketches.")
+    parser.add_argument("--compact", action="store_true")
+    args = parser.parse_args()
+    for sketch in sketches():
+        if args.compact:
+            compact(sketch)
+        digest = merge([_read(path) for path in glob.glob(os.path.join(SKETCH_DIR, sketch, "*.json"))])
+        quartiles = ", ".join(f"{quantile(digest, q):.1f}" for q in (0.25, 0.5, 0.75))
+        print(f"{sketch}: {int(count(digest))} games, quartiles {quartiles}, {len(digest.means)} centroids")
@@ -0,0 +1,72 @@
+import pandas as pd
+import streamlit as st
+
+import charts
+import engine
+
+# ------------------------------
+# 🗂️ Candidate Plan Comparison
+# ------------------------------
+# Players save the plan they have played so far under a name, branch
+# variants that change one year, and see every saved plan on one chart and
+# one table. Evaluation goes through engine.trajectory(), so variants share
+# the cached years they have in common with the plan they came from.
+
+
+def _level_label(scenario):
+    return f"Remaining {scenario.metric.replace(' Reduction', '')} (% of baseline)"
+
+
+def _table(scenario, plans):
+    rows = {}
+    for name, plan in plans.items():
+        level, budget = engine.trajectory(scenario, plan)[-1]
+        rows[name] = {
+            "Years": len(plan),
+            "Final Level": round(level, 2),
+            "Remaining Budget": round(budget, 2),
+            "Target Met": level <= scenario.starting_level - scenario.target,
+        }
+    return pd.DataFrame.from_dict(rows, orient="index")
+
+
+@st.fragment
+def render(scenario, game_data):
+    st.header("🗂️ Compare Candidate Plans")
+    plans = st.session_state.setdefault("plans", {})
+
+    name = st.text_input("Plan name", key="plan_name") or f"Plan {len(plans) + 1}"
+    if st.button("Save current plan", disabled=not game_data["Year"]):
+        plans[name] = [list(chosen) for chosen in game_data["Chosen Initiatives"]]
+
+    if plans:
+        with st.expander("Branch a variant"):
+            base = st.selectbox("Start from", list(plans), key="variant_base")
+            year = st.number_input("Change year", min_value=1, max_value=len(plans[base]), value=len(plans[base]), key="variant_year")
+            chosen = st.multiselect(
+                f"Initiatives for Year {year}",
+                scenario.names,
+                default=plans[base][year - 1],
+                max_selections=scenario.max_selections,
+                key=f"variant_choice_{base}_{year}",  # A new base or year starts from its own picks
+            )
+            if st.button("Save variant", disabled=not chosen):
+                variant = [list(c) for c in plans[base]]
+                variant[year - 1] = chosen
+                plans[f"{base} / Y{year}"] = variant
+
+        remove = st.selectbox("Remove a plan", ["—"] + list(plans), key="plan_remove")
+        if remove != "—" and st.button("Remove"):
+            del plans[remove]
+
+    if plans:
+        st.dataframe(_table(scenario, plans))
+        charts.line_chart(
+            [
+                (name, range(1, len(plan) + 1), [level for level, _ in engine.trajectory(scenario, plan)])
+                for name, plan in plans.items()
+            ],
+            title="Candidate Plans",
+            ylabel=_level_label(scenario),
+            target=scenario.starting_level - scenario.target,
+        )
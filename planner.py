@@ -0,0 +1,293 @@
+import argparse
+import os
+import time
+from bisect import bisect_right
+from fractions import Fraction
+from functools import lru_cache
+from math import gcd, lcm
+
+import numpy as np
+
+import engine
+import scenarios
+import tables
+
+# ------------------------------
+# 🎯 Best Achievable Plan (Branch and Bound)
+# ------------------------------
+# Over a whole game each initiative can be picked at most once per year and
+# at most `max_selections` initiatives per year, so a plan is a count per
+# initiative (0..years) with at most max_selections * years picks in total
+# and total cost within the budget. Any such set of counts can be laid out
+# year by year (see _schedule), so the search runs over counts:
+#
+#   - initiatives are sorted by reduction per $M, best first
+#   - each node is bounded by the fractional (LP) knapsack over the
+#     remaining initiatives and by remaining picks x best remaining impact
+#   - the search is depth-first, greedy count first, so a good plan is
+#     found immediately; with a time budget the best plan so far is
+#     returned when time runs out (anytime mode)
+#
+# Synergy pairs depend on which initiatives share a year, and compounding
+# depends on how reductions are spread over years; counts capture neither.
+# For such scenarios the search runs on the additive impacts, the result
+# is rescored by the engine and is not marked optimal. (With compounding,
+# picks are packed into as few years as possible: (1 - a)(1 - b) is more
+# than 1 - a - b, so a cut left for another year counts for less.)
+#
+# exact() solves any scenario, synergies included, by dynamic programming
+# over years x budget on the selections table (see tables.py). A year adds
+# its reduction to the total (additive) or -log of the share of the level
+# it keeps (compounding), so either way the years add up independently.
+# best_plan() uses it when the catalog has tables and the budget splits
+# into at most MAX_BUDGET_CELLS cost units, and the search otherwise; the
+# app horizons (YEARS) are kept in a table built once per scenario version
+# and shared by all processes. The apps call best_plan() on every rerun, so
+# its search stops after SEARCH_SECONDS with the best plan found so far.
+
+EPS = 1e-9
+MAX_BUDGET_CELLS = 2000  # Budget / cost unit, e.g. $15M in $0.5M units is 30
+YEARS = range(3, 8)  # Horizons the apps offer; their best plans are kept in a shared table
+SEARCH_SECONDS = 0.5  # best_plan()'s time budget when the catalog has to be searched
+BEST_DTYPE = np.dtype([
+    ("years", "<i8"), ("reduction", "<f8"), ("cost", "<f8"), ("optimal", "?"), ("nodes", "<i8"),
+    ("plan", "<i8", (YEARS.stop - 1,)),  # Row of the selections table per year, -1 for none
+])
+
+
+def _items(scenario):
+    items = []
+    for name in scenario.names:
+        reduction = scenario.initiatives[name].get(scenario.metric, 0)
+        cost = scenario.initiatives[name]["Cost"]
+        if reduction > 0:
+            items.append((name, reduction, cost))
+    items.sort(key=lambda item: item[1] / item[2] if item[2] > 0 else float("inf"), reverse=True)
+    return items
+
+
+def _schedule(names, counts, years):
+    # Lay the copies out in item order and deal them to years round-robin:
+    # an item has at most `years` copies, so its copies land in distinct years
+    plan = [[] for _ in range(years)]
+    position = 0
+    for name, count in zip(names, counts):
+        for _ in range(count):
+            plan[position % years].append(name)
+            position += 1
+    return plan
+
+
+def _pack(names, counts, years, per_year):
+    # Fill one year after another, each with the items that have the most
+    # copies left (an item's copies must still fit in distinct years)
+    left = dict(zip(names, counts))
+    plan = []
+    for _ in range(years):
+        chosen = sorted((name for name in names if left[name]), key=lambda name: -left[name])[:per_year]
+        for name in chosen:
+            left[name] -= 1
+        plan.append(chosen)
+    return plan
+
+
+def search(scenario, years, time_budget=None):
+    items = _items(scenario)
+    names = [name for name, _, _ in items]
+    reductions = [reduction for _, reduction, _ in items]
+    costs = [cost for _, _, cost in items]
+    n = len(items)
+    slots = scenario.max_selections * years
+    deadline = None if time_budget is None else time.perf_counter() + time_budget
+
+    # Prefix sums over "all `years` copies of each item" for the LP bound
+    cum_cost = [0.0]
+    cum_reduction = [0.0]
+    for reduction, cost in zip(reductions, costs):
+        cum_cost.append(cum_cost[-1] + years * cost)
+        cum_reduction.append(cum_reduction[-1] + years * reduction)
+    best_suffix = [0] * (n + 1)
+    for k in range(n - 1, -1, -1):
+        best_suffix[k] = max(reductions[k], best_suffix[k + 1])
+
+    def bound(k, budget):
+        # Fractional knapsack over items k.. with `years` copies each
+        m = bisect_right(cum_cost, cum_cost[k] + budget + EPS, lo=k) - 1
+        value = cum_reduction[m] - cum_reduction[k]
+        if m < n and costs[m] > 0:
+            value += (budget - (cum_cost[m] - cum_cost[k])) / costs[m] * reductions[m]
+        return value
+
+    best = {"value": 0.0, "counts": [0] * n}
+    counts = [0] * n
+    nodes = 0
+    timed_out = False
+
+    def dfs(k, budget, slots_left, value):
+        nonlocal nodes, timed_out
+        if value > best["value"] + EPS:
+            best["value"] = value
+            best["counts"] = counts[:]
+        if k == n or slots_left == 0 or timed_out:
+            return
+        nodes += 1
+        if deadline is not None and nodes % 1024 == 0 and time.perf_counter() > deadline:
+            timed_out = True
+            return
+        if value + min(bound(k, budget), slots_left * best_suffix[k]) <= best["value"] + EPS:
+            return
+        most = min(years, slots_left)
+        if costs[k] > 0:
+            most = min(most, int((budget + EPS) // costs[k]))
+        for count in range(most, -1, -1):
+            counts[k] = count
+            dfs(k + 1, budget - count * costs[k], slots_left - count, value + count * reductions[k])
+        counts[k] = 0
+
+    dfs(0, scenario.budget, slots, 0.0)
+    if scenario.reduction_model == "compounding":
+        plan = _pack(names, best["counts"], years, scenario.max_selections)
+    else:
+        plan = _schedule(names, best["counts"], years)
+    summary = engine.summarize(scenario, engine.play(scenario, plan))
+    exact = not scenario.synergies and scenario.reduction_model == "additive"
+    return {
+        "plan": plan,
+        "reduction": summary["Total Reduction"],
+        "cost": summary["Total Cost"],
+        "optimal": not timed_out and exact,
+        "nodes": nodes,
+    }
+
+
+def _cost_unit(scenario):
+    # Largest amount every initiative cost is a whole multiple of, e.g. 0.5
+    costs = [Fraction(scenario.initiatives[name]["Cost"]).limit_denominator(1000) for name in scenario.names]
+    denominator = lcm(*(cost.denominator for cost in costs))
+    return Fraction(gcd(*(int(cost * denominator) for cost in costs)) or 1, denominator)
+
+
+def _budget_cells(scenario):
+    return int(scenario.budget / float(_cost_unit(scenario)) + EPS)
+
+
+def solvable(scenario):
+    # Whether exact() applies
+    return tables.fits(scenario) and _budget_cells(scenario) <= MAX_BUDGET_CELLS
+
+
+def _exact_rows(scenario, years):
+    # Selections row per year (-1: none) of the best plan and the number of
+    # DP states. A year's value does not depend on the other years, so only
+    # the best selection of each cost matters; best[b] is the largest total
+    # over the years so far that costs at most b units.
+    selections = tables.selections(scenario)
+    cells = _budget_cells(scenario)
+    cost = np.rint(np.asarray(selections["cost"]) / float(_cost_unit(scenario))).astype(np.int64)
+    value = np.asarray(selections["reduction"])
+    if scenario.reduction_model == "compounding":
+        with np.errstate(divide="ignore"):
+            value = -np.log(np.clip(1 - value / 100, 0, None))  # inf for a 100% cut
+    # The table is sorted cheapest first, largest reduction first within a cost
+    _, first = np.unique(cost, return_index=True)
+    options = [(int(cost[row]), float(value[row]), int(row)) for row in first if cost[row] <= cells and value[row] > 0]
+
+    best = np.zeros(cells + 1)
+    choice = np.full((years, cells + 1), -1, dtype=np.int64)
+    for year in range(years):
+        new = best.copy()
+        for units, gain, row in options:
+            candidate = best[: cells + 1 - units] + gain
+            better = candidate > new[units:] + EPS
+            new[units:][better] = candidate[better]
+            choice[year, units:][better] = row
+        best = new
+
+    rows, left = [], cells
+    for year in range(years - 1, -1, -1):
+        row = int(choice[year, left])
+        rows.append(row)
+        if row >= 0:
+            left -= int(cost[row])
+    return rows[::-1], years * (cells + 1) * len(options)
+
+
+def _result(scenario, rows, nodes):
+    selections = tables.selections(scenario)
+    plan = [tables.names(scenario, selections["picks"][row]) if row >= 0 else [] for row in rows]
+    summary = engine.summarize(scenario, engine.play(scenario, plan))
+    return {
+        "plan": plan,
+        "reduction": summary["Total Reduction"],
+        "cost": summary["Total Cost"],
+        "optimal": True,
+        "nodes": nodes,
+    }
+
+
+def exact(scenario, years):
+    rows, nodes = _exact_rows(scenario, years)
+    return _result(scenario, rows, nodes)
+
+
+def _build_best(scenario):
+    rows = np.zeros(len(YEARS), dtype=BEST_DTYPE)
+    for row, years in zip(rows, YEARS):
+        plan, nodes = _exact_rows(scenario, years)
+        result = _result(scenario, plan, nodes)
+        row["years"] = years
+        row["reduction"], row["cost"] = result["reduction"], result["cost"]
+        row["optimal"], row["nodes"] = True, nodes
+        row["plan"] = -1
+        row["plan"][:years] = plan
+    return rows
+
+
+@lru_cache(maxsize=256)
+def best_plan(scenario, years):
+    if not solvable(scenario):
+        return search(scenario, years, SEARCH_SECONDS)
+    if years not in YEARS:
+        return exact(scenario, years)
+    selections = tables.selections(scenario)
+    row = tables.table(scenario, "best", _build_best)[years - YEARS.start]
+    return {
+        "plan": [tables.names(scenario, selections["picks"][i]) if i >= 0 else [] for i in row["plan"][:years]],
+        "reduction": float(row["reduction"]),
+        "cost": float(row["cost"]),
+        "optimal": bool(row["optimal"]),
+        "nodes": int(row["nodes"]),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Best achievable plan for a scenario.")
+    parser.add_argument("scenario", help="scenario id or path to a scenario JSON file")
+    parser.add_argument("--years", type=int, default=5)
+    parser.add_argument("--time-budget", type=float, default=None, help="seconds (anytime mode)")
+    parser.add_argument("--tables", action="store_true", help="build the shared tables of this scenario version and remove older ones")
+    args = parser.parse_args()
+    if args.scenario.endswith(".json"):
+        scenario = scenarios.from_file(args.scenario)
+    else:
+        scenario = scenarios.load(args.scenario)
+    if args.tables and not tables.fits(scenario):
+        raise SystemExit(f"{args.scenario}: {tables.selection_count(scenario):,} yearly selections, more than tables.MAX_SELECTIONS; no tables are built")
+    if args.tables:
+        tables.prune(scenario)
+        tables.selections(scenario)
+        tables.frontier(scenario)
+        if solvable(scenario):
+            tables.table(scenario, "best", _build_best)
+        print(f"Tables in {os.path.dirname(tables.path(scenario, 'selections'))}")
+    else:
+        started = time.perf_counter()
+        if args.time_budget is None and solvable(scenario):
+            result = exact(scenario, args.years)
+        else:
+            result = search(scenario, args.years, args.time_budget)
+        elapsed = time.perf_counter() - started
+        for year, chosen in enumerate(result["plan"], start=1):
+            print(f"Year {year}: {', '.join(chosen) or '-'}")
+        status = "optimal" if result["optimal"] else "best found"
+        print(f"{scenario.metric}: {result['reduction']} for ${result['cost']}M ({status}, {result['nodes']} nodes, {elapsed:.3f}s)")
@@ -0,0 +1,257 @@
+import argparse
+import glob
+import html
+import io
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+from matplotlib import rc_context
+from matplotlib.backends.backend_pdf import PdfPages
+from matplotlib.figure import Figure
+from matplotlib.transforms import Bbox
+
+import engine
+import experiments
+import grid_profile
+import planner
+import routing
+import scenarios
+import scoring
+import session_store
+import thermal
+
+# ------------------------------
+# 📝 Batch Student Reports
+# ------------------------------
+# Reads the games stored by session_store (run session_store.flush() or
+# wait for the idle sweep first) and writes one report per game:
+#
+#   python reports.py --out student_reports --format html
+#
+# Each report holds the student's results table, their trajectory against
+# the best achievable plan, their score and the gap to the optimum, all on
+# the scenario variant the game was played on: its version, saved with the
+# game, names the adjustments (routing, grid profile, thermal model,
+# experiment variants) that are applied again here. A game whose variant
+# cannot be rebuilt is reported on the current scenario, with a note.
+# Reports are rendered in a process pool; every worker draws all of its
+# charts on one figure, replacing line data instead of building a figure
+# per report.
+
+APP_SCENARIOS = {
+    "12app": "industry40",
+    "17app": "green_building",
+    "18app": "kalundborg",
+    "19app": "kalundborg",
+}
+
+APP_SCORING = {  # Scoring rule each app shows (see scoring.py)
+    "17app": "green_building",
+    "18app": "kalundborg",
+    "19app": "reduction_points",
+}
+
+VARIANTS = {  # Version tag -> rebuilds that variant (experiment tags aside)
+    "routing": routing.reapply,
+    "grid": grid_profile.reapply,
+    "thermal": thermal.reapply,
+}
+
+PAGE = (8.27, 11.69)  # A4 portrait, for PDF pages
+CHART_AREA = Bbox([[0, PAGE[1] * 0.5], [PAGE[0], PAGE[1]]])  # Top half of the page, in inches
+
+_canvas = None  # Per worker: (figure, chart axes, table axes, lines)
+
+
+def _worker_canvas():
+    global _canvas
+    if _canvas is None:
+        fig = Figure(figsize=PAGE)
+        chart = fig.add_axes([0.1, 0.55, 0.85, 0.38])
+        table = fig.add_axes([0.05, 0.05, 0.9, 0.42])
+        table.axis("off")
+        student, = chart.plot([], [], marker="o", linestyle="-", label="Your plan")
+        best, = chart.plot([], [], marker="s", linestyle=":", label="Best achievable")
+        target = chart.axhline(y=0, color="r", linestyle="--", label="Target")
+        chart.set_xlabel("Year")
+        chart.set_ylabel("Remaining level (% of baseline)")
+        chart.grid(True)
+        chart.legend()
+        _canvas = (fig, chart, table, {"student": student, "best": best, "target": target})
+    return _canvas
+
+
+def _variant(scenario, version):
+    # `scenario` with the adjustments named by the tags of `version`, e.g.
+    # "<hash>~routing=40~budget_15_vs_13=tight_budget", applied in order
+    base, *tags = version.split("~")
+    if base != scenario.version:
+        raise ValueError(f"{scenario.id} has changed since version {base}")
+    declared = {experiment for experiment, _ in scenario.experiments}
+    arms = []
+    for key, value in (tag.split("=", 1) for tag in tags):
+        if key in declared:
+            arms.append((key, value))
+            continue
+        if arms:
+            scenario, arms = experiments.reapply(scenario, arms), []
+        if key not in VARIANTS:
+            raise ValueError(f"unknown scenario variant {key}")
+        scenario = VARIANTS[key](scenario, value)
+    if arms:
+        scenario = experiments.reapply(scenario, arms)
+    if scenario.version != version:
+        raise ValueError(f"rebuilt {scenario.version}, not {version}")
+    return scenario
+
+
+def build(app, path):
+    # Everything a report shows, for one stored game
+    scenario = scenarios.load(APP_SCENARIOS[app])
+    game, version = session_store.load(path)
+    years = len(game["Year"])
+    if not years:
+        return None
+    note = None
+    if version is None:
+        note = "Scenario variant not recorded; scored on the current scenario"
+    else:
+        try:
+            scenario = _variant(scenario, version)
+        except ValueError as error:
+            note = f"Scenario variant {version} not rebuilt ({error}); scored on the current scenario"
+    levels = engine.levels(scenario, game[scenario.metric])
+    reduction = scenario.starting_level - levels[-1]
+    best = planner.best_plan(scenario, years)
+    best_levels = [level for level, _ in engine.trajectory(scenario, best["plan"])]
+    score = scoring.total(scenario, game, APP_SCORING[app]) if app in APP_SCORING else None
+
+    table = pd.DataFrame(game)
+    table["Chosen Initiatives"] = table["Chosen Initiatives"].map(", ".join)
+    table["Remaining Level"] = levels.round(2)
+    return {
+        "game_id": os.path.basename(path).split(".")[0],
+        "scenario": scenario,
+        "table": table,
+        "years": game["Year"],
+        "levels": list(levels),
+        "best_levels": best_levels,
+        "reduction": round(float(reduction), 2),
+        "best_reduction": best["reduction"],
+        "score": score,
+        "note": note,
+    }
+
+
+def _draw(report):
+    fig, chart, table, lines = _worker_canvas()
+    scenario = report["scenario"]
+    lines["student"].set_data(report["years"], report["levels"])
+    lines["best"].set_data(range(1, len(report["best_levels"]) + 1), report["best_levels"])
+    lines["target"].set_ydata([scenario.starting_level - scenario.target] * 2)
+    chart.relim()
+    chart.autoscale_view()
+    chart.set_title(f"{scenario.metric} Over Time")
+    return fig, table
+
+
+def _summary(report):
+    lines = [f"{report['scenario'].metric}: {report['reduction']} (best achievable: {report['best_reduction']})"]
+    if report["score"] is not None:
+        lines.append(f"Final Score: {report['score']:.0f}/100")
+    if report["note"]:
+        lines.append(report["note"])
+    return lines
+
+
+def render_html(report):
+    # Only the chart half of the page, with text kept as SVG text
+    fig, table = _draw(report)
+    buffer = io.StringIO()
+    with rc_context({"svg.fonttype": "none"}):
+        fig.savefig(buffer, format="svg", bbox_inches=CHART_AREA, metadata={"Date": None})
+    summary = "".join(f"<li>{html.escape(line)}</li>" for line in _summary(report))
+    return (
+        "<!doctype html><html><head><meta charset='utf-8'>"
+        f"<title>{html.escape(report['scenario'].title)} report</title></head><body>"
+        f"<h1>{html.escape(report['scenario'].title)}</h1><p>Game {report['game_id']}</p>"
+        f"<ul>{summary}</ul>{report['table'].to_html(index=False)}{buffer.getvalue()}</body></html>"
+    )
+
+
+def render_pdf(report):
+    fig, table = _draw(report)
+    # One initiative per line in the wide second column
+    rows = report["table"].astype(str).values.tolist()
+    for row in rows:
+        row[1] = row[1].replace(", ", "\n")
+    cells = table.table(
+        cellText=rows,
+        colLabels=list(report["table"].columns),
+        colWidths=[0.07, 0.43, 0.12, 0.12, 0.14, 0.12],
+        loc="upper center",
+    )
+    cells.auto_set_font_size(False)
+    cells.set_fontsize(7)
+    cells.scale(1, 3)
+    heading = fig.text(0.1, 0.96, " · ".join(_summary(report)), fontsize=10)
+    buffer = io.BytesIO()
+    with PdfPages(buffer, metadata={"CreationDate": None}) as pdf:
+        pdf.savefig(fig)
+    cells.remove()
+    heading.remove()
+    return buffer.getvalue()
+
+
+def write_report(app, path, out_dir, fmt):
+    report = build(app, path)
+    if report is None:
+        return None
+    target = os.path.join(out_dir, app, f"{report['game_id']}.{fmt}")
+    if fmt == "html":
+        with open(target, "w", encoding="utf-8") as f:
+            f.write(render_html(report))
+    else:
+        with open(target, "wb") as f:
+            f.write(render_pdf(report))
+    return target
+
+
+def stored_games(apps=None):
+    # (app, path) for every spilled game of the apps that have a scenario
+    games = []
+    for app in apps or APP_SCENARIOS:
+        pattern = os.path.join(session_store.STATE_DIR, "games", app, "*.json.gz")
+        games.extend((app, path) for path in sorted(glob.glob(pattern)))
+    return games
+
+
+def generate(out_dir, fmt="html", apps=None, workers=None):
+    games = stored_games(apps)
+    for app in {app for app, _ in games}:
+        os.makedirs(os.path.join(out_dir, app), exist_ok=True)
+    chunksize = max(1, len(games) // ((workers or os.cpu_count() or 1) * 8))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        written = pool.map(
+            write_report,
+            [app for app, _ in games],
+            [path for _, path in games],
+            [out_dir] * len(games),
+            [fmt] * len(games),
+            chunksize=chunksize,
+        )
+        return [path for path in written if path]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Write one report per stored game.")
+    parser.add_argument("--out", default="student_reports")
+    parser.add_argument("--format", choices=["html", "pdf"], default="html")
+    parser.add_argument("--apps", nargs="*", choices=sorted(APP_SCENARIOS), default=None)
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+    started = time.perf_counter()
+    written = generate(args.out, args.format, args.apps, args.workers)
+    print(f"{len(written)} reports in {args.out}/ ({time.perf_counter() - started:.1f}s)")
@@ -0,0 +1,174 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass
+from types import MappingProxyType
+
+# ------------------------------
+# 📚 Shared Scenario Data
+# ------------------------------
+# Scenario definitions live in scenario_data/<scenario id>.json. Each one is
+# parsed once into a frozen Scenario that every session and every rerun
+# shares by reference.
+#
+# load() re-checks the file's mtime and size at most every
+# GAME_SCENARIO_CHECK seconds (default 1). An edited file is re-read on the
+# next rerun of any session, without a restart; if its content hash is
+# unchanged the old object is kept. Derived caches (catalog codes, solver
+# tables, planner results) are keyed by the Scenario, i.e. by (id,
+# version), so an edit misses them and unchanged scenarios keep theirs.
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "scenario_data")
+REDUCTION_MODELS = ("additive", "compounding")
+EXPERIMENT_FIELDS = ("starting_level", "target", "budget", "max_selections")  # What a variant may change
+GRID_MODELS = ("solar", "monitoring")  # See grid_profile.py
+GRID_SAVES = ("emissions", "load")
+ROUTING_MODELS = ("optimized_routes", "electric", "hydrogen")  # See routing.py
+THERMAL_FIELDS = (  # Building fields a retrofit may change; see thermal.py
+    "wall_u", "roof_u", "roof_absorptance", "window_solar", "ventilation", "night_ventilation", "capacitance", "internal_gains",
+)
+CHECK_INTERVAL = float(os.environ.get("GAME_SCENARIO_CHECK", "1"))
+
+log = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_loaded = {}  # scenario id -> [last check, (mtime_ns, size), Scenario]
+
+
+@dataclass(frozen=True, eq=False)
+class Scenario:
+    id: str
+    version: str  # Content hash of the definition file
+    title: str
+    metric: str  # Impact key summed by the game, e.g. "CO2 Reduction"
+    starting_level: float
+    target: float
+    budget: float
+    max_selections: int
+    initiatives: MappingProxyType  # name -> read-only attribute mapping
+    names: tuple  # Initiative names in catalog order (multiselect options)
+    synergies: tuple = ()  # (name, name, extra reduction) when both are picked in one year
+    reduction_model: str = "additive"  # or "compounding": each year cuts a share of what is left
+    pools: tuple = ()  # (pool name, share of firms served per year, initiative names) for market mode
+    scoring: str = None  # Default scoring rule name (see scoring.py)
+    experiments: tuple = ()  # (experiment name, ((variant name, overrides), ...)); see experiments.py
+    grid_profile: tuple = ()  # (initiative name, model, "emissions" or "load") derived from an hourly profile
+    thermal: tuple = ()  # (initiative name, ((field, factor), ...), ((field, amount), ...)) for the building model
+    routing: tuple = ()  # (seed, stops, logistics share, ((initiative name, model), ...)) for the fleet model
+
+    def __hash__(self):
+        return hash((self.id, self.version))
+
+    def __eq__(self, other):
+        return isinstance(other, Scenario) and (self.id, self.version) == (other.id, other.version)
+
+
+def _freeze(scenario_id, raw):
+    definition = json.loads(raw)
+    initiatives = {name: MappingProxyType(dict(attrs)) for name, attrs in definition["initiatives"].items()}
+    synergies = []
+    for first, second, amount in definition.get("synergies", []):
+        # Negative amounts are overlaps: the pair saves less than its sum
+        if first not in initiatives or second not in initiatives or first == second:
+            raise ValueError(f"{scenario_id}: bad synergy pair {first!r} / {second!r}")
+        synergies.append((first, second, amount))
+    pools = []
+    for pool, spec in definition.get("pools", {}).items():
+        unknown = [name for name in spec["initiatives"] if name not in initiatives]
+        if unknown or not 0 < spec["share"] <= 1:
+            raise ValueError(f"{scenario_id}: bad pool {pool!r}")
+        pools.append((pool, spec["share"], tuple(spec["initiatives"])))
+    experiments = []
+    for experiment, variants in definition.get("experiments", {}).items():
+        if len(variants) < 2 or any(key not in EXPERIMENT_FIELDS for overrides in variants.values() for key in overrides):
+            raise ValueError(f"{scenario_id}: bad experiment {experiment!r}")
+        experiments.append((experiment, tuple((variant, MappingProxyType(dict(overrides))) for variant, overrides in variants.items())))
+    grid_profile = []
+    for name, spec in definition.get("grid_profile", {}).items():
+        if name not in initiatives or spec["model"] not in GRID_MODELS or spec["saves"] not in GRID_SAVES:
+            raise ValueError(f"{scenario_id}: bad grid_profile entry {name!r}")
+        grid_profile.append((name, spec["model"], spec["saves"]))
+    thermal = []
+    for name, spec in definition.get("thermal", {}).items():
+        scale, add = spec.get("scale", {}), spec.get("add", {})
+        if name not in initiatives or any(field not in THERMAL_FIELDS for field in [*scale, *add]):
+            raise ValueError(f"{scenario_id}: bad thermal entry {name!r}")
+        thermal.append((name, tuple(scale.items()), tuple(add.items())))
+    routing = ()
+    if "routing" in definition:
+        spec = definition["routing"]
+        models = tuple(spec["initiatives"].items())
+        if any(name not in initiatives or model not in ROUTING_MODELS for name, model in models) or not 0 < spec["share"] <= 1:
+            raise ValueError(f"{scenario_id}: bad routing model")
+        routing = (spec["seed"], spec["stops"], spec["share"], models)
+    reduction_model = definition.get("reduction_model", "additive")
+    if reduction_model not in REDUCTION_MODELS:
+        raise ValueError(f"{scenario_id}: unknown reduction_model {reduction_model!r}")
+    return Scenario(
+        id=scenario_id,
+        version=hashlib.sha1(raw).hexdigest()[:12],
+        title=definition["title"],
+        metric=definition["metric"],
+        starting_level=definition["starting_level"],
+        target=definition["target"],
+        budget=definition["budget"],
+        max_selections=definition["max_selections"],
+        initiatives=MappingProxyType(initiatives),
+        names=tuple(initiatives),
+        synergies=tuple(synergies),
+        reduction_model=reduction_model,
+        pools=tuple(pools),
+        scoring=definition.get("scoring"),
+        experiments=tuple(experiments),
+        grid_profile=tuple(grid_profile),
+        thermal=tuple(thermal),
+        routing=routing,
+    )
+
+
+def available():
+    return tuple(sorted(name[:-5] for name in os.listdir(DATA_DIR) if name.endswith(".json")))
+
+
+def from_file(path):
+    # A custom catalog outside scenario_data/, e.g. for the planner CLI
+    with open(path, "rb") as f:
+        return _freeze(os.path.splitext(os.path.basename(path))[0], f.read())
+
+
+def load(scenario_id):
+    entry = _loaded.get(scenario_id)
+    now = time.monotonic()
+    if entry is not None and now - entry[0] < CHECK_INTERVAL:
+        return entry[2]
+
+    with _lock:
+        entry = _loaded.get(scenario_id)
+        path = os.path.join(DATA_DIR, f"{scenario_id}.json")
+        signature = None
+        try:
+            stat = os.stat(path)
+            signature = (stat.st_mtime_ns, stat.st_size)
+            if entry is not None and entry[1] == signature:
+                entry[0] = now
+                return entry[2]
+            scenario = from_file(path)
+        except (OSError, ValueError, KeyError, TypeError):
+            # A half-saved or broken edit keeps the last good version live;
+            # remembering its signature warns once, not on every check
+            if entry is None:
+                raise
+            log.warning("Keeping %s version %s; could not reload %s", scenario_id, entry[2].version, path, exc_info=True)
+            entry[0] = now
+            entry[1] = signature
+            return entry[2]
+
+        if entry is not None and entry[2].version == scenario.version:
+            scenario = entry[2]  # Touched but not changed
+        elif entry is not None:
+            log.info("Reloaded %s: version %s -> %s", scenario_id, entry[2].version, scenario.version)
+        _loaded[scenario_id] = [now, signature, scenario]
+        return scenario
@@ -0,0 +1,55 @@
+import importlib
+from functools import lru_cache
+from importlib.metadata import entry_points
+
+# ------------------------------
+# 🧮 Scoring Plugins
+# ------------------------------
+# A scoring rule is a module with
+#
+#   score(scenario, game_data)    -> {component name: points}
+#   metrics(scenario, game_data)  -> {metric name: value}   (optional)
+#
+# Rules are named. A scenario file picks its default with "scoring"; an
+# app may ask for another rule by name. Names resolve to the built-in
+# modules below or to entry points (naming a module) in the
+# ENTRY_POINT_GROUP group of any installed package. Nothing is imported
+# until a rule is first used, so a specialised rule costs nothing to
+# games that never score with it.
+
+RULES = {
+    "green_building": "scoring_plugins.green_building",
+    "kalundborg": "scoring_plugins.kalundborg",
+    "reduction_points": "scoring_plugins.reduction_points",
+}
+ENTRY_POINT_GROUP = "sustainability_game.scoring"
+
+
+@lru_cache(maxsize=None)
+def rule(name):
+    if name in RULES:
+        return importlib.import_module(RULES[name])
+    for entry_point in entry_points(group=ENTRY_POINT_GROUP):
+        if entry_point.name == name:
+            return entry_point.load()
+    raise KeyError(f"No scoring rule named {name!r}")
+
+
+def _rule_for(scenario, name):
+    name = name or scenario.scoring
+    if name is None:
+        raise KeyError(f"Scenario {scenario.id!r} has no scoring rule")
+    return rule(name)
+
+
+def score(scenario, game_data, name=None):
+    return _rule_for(scenario, name).score(scenario, game_data)
+
+
+def total(scenario, game_data, name=None):
+    return sum(score(scenario, game_data, name).values())
+
+
+def metrics(scenario, game_data, name=None):
+    plugin = _rule_for(scenario, name)
+    return plugin.metrics(scenario, game_data) if hasattr(plugin, "metrics") else {}
@@ -0,0 +1 @@
+# Scoring rules shipped with the game; see scoring.py for how they are found.
@@ -0,0 +1,21 @@
+import engine
+
+# Green building: cooling load cut against the target, plus a bonus for
+# staying within budget. Noise reduction is reported but not scored.
+
+
+def score(scenario, game_data):
+    reduction = scenario.starting_level - engine.levels(scenario, game_data[scenario.metric])[-1]
+    return {
+        "Cooling": min(30, reduction / scenario.target * 30),
+        "Budget": 10 if game_data["Remaining Budget"][-1] > 0 else 0,
+    }
+
+
+def metrics(scenario, game_data):
+    noise = sum(
+        scenario.initiatives[name].get("Noise Reduction", 0)
+        for chosen in game_data["Chosen Initiatives"]
+        for name in chosen
+    )
+    return {"Noise Reduction": noise}
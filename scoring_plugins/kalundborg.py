@@ -0,0 +1,16 @@
+import engine
+
+# Kalundborg symbiosis: CO2 cut against the target, a budget reserve
+# bonus, and bonuses for stakeholder outreach and industry growth when
+# those initiatives were picked in any year.
+
+
+def score(scenario, game_data):
+    reduction = scenario.starting_level - engine.levels(scenario, game_data[scenario.metric])[-1]
+    picked = {name for chosen in game_data["Chosen Initiatives"] for name in chosen}
+    return {
+        "CO2": min(30, reduction / scenario.target * 30),
+        "Budget": 10 if game_data["Remaining Budget"][-1] > 5 else 0,
+        "Stakeholders": 15 if "Public Awareness & ESG Branding" in picked else 5,
+        "Industry Growth": 15 if "New Industry Partner Expansion" in picked else 5,
+    }
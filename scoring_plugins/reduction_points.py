@@ -0,0 +1,8 @@
+import engine
+
+# One point per percentage point of total reduction.
+
+
+def score(scenario, game_data):
+    reduction = scenario.starting_level - engine.levels(scenario, game_data[scenario.metric])[-1]
+    return {"Reduction": int(reduction)}
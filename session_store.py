@@ -0,0 +1,145 @@
+import copy
+import gzip
+import json
+import os
+import threading
+import time
+import uuid
+
+import streamlit as st
+
+import metrics
+
+# ------------------------------
+# 💾 Game State Store with Idle Eviction
+# ------------------------------
+# Games live here (keyed by a game id kept in session_state and in the page
+# URL) instead of inside st.session_state. A background sweep writes games
+# that have been idle longer than the TTL to gzipped JSON on local disk and
+# drops them from memory; the next rerun of that session loads them back.
+# A spilled file also names the scenario version the game was played on
+# (see reports.py).
+#
+#   GAME_STATE_DIR  where spilled games are written (default .game_state)
+#   GAME_IDLE_TTL   seconds of inactivity before a game is spilled (default 900)
+
+STATE_DIR = os.environ.get("GAME_STATE_DIR", ".game_state")
+IDLE_TTL = float(os.environ.get("GAME_IDLE_TTL", "900"))
+SWEEP_INTERVAL = max(5.0, IDLE_TTL / 4)
+
+_lock = threading.Lock()
+_games = {}  # (app, game id) -> [last access time, game dict, scenario version]
+_templates = {}  # app -> template for new games
+_spill_hooks = []  # Called as hook(app, game id) after the sweep spills a game
+_sweeper_started = False
+
+
+def _path(app, game_id):
+    return os.path.join(STATE_DIR, "games", app, f"{game_id}.json.gz")
+
+
+def _spill(app, game_id, game, version):
+    path = _path(app, game_id)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with gzip.open(tmp, "wt", encoding="utf-8") as f:
+        json.dump({"scenario_version": version, "game": game}, f, separators=(",", ":"))
+    os.replace(tmp, path)
+
+
+def load(path):
+    # (game dict, scenario version) from a spilled file
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        data = json.load(f)
+    return data["game"], data["scenario_version"]
+
+
+def _rehydrate(app, game_id):
+    try:
+        return load(_path(app, game_id))
+    except (OSError, ValueError):
+        return None, None
+
+
+def on_spill(hook):
+    # Per-game state kept elsewhere (e.g. team_store) can be dropped with
+    # the game
+    _spill_hooks.append(hook)
+
+
+def sweep(now=None):
+    now = time.time() if now is None else now
+    with _lock:
+        idle = [(key, entry) for key, entry in _games.items() if now - entry[0] > IDLE_TTL]
+        for (app, game_id), (_, game, version) in idle:
+            _spill(app, game_id, game, version)
+            del _games[(app, game_id)]
+        resident = len(_games)
+    metrics.set_gauge("game_resident_games", resident)
+    for (app, game_id), _ in idle:
+        for hook in _spill_hooks:
+            hook(app, game_id)
+    return len(idle)
+
+
+def _start_sweeper():
+    global _sweeper_started
+    with _lock:
+        if _sweeper_started:
+            return
+        _sweeper_started = True
+
+    def loop():
+        while True:
+            time.sleep(SWEEP_INTERVAL)
+            sweep()
+
+    threading.Thread(target=loop, name="game-state-sweeper", daemon=True).start()
+
+
+def flush():
+    # Spill every resident game, e.g. before a planned restart
+    with _lock:
+        for (app, game_id), (_, game, version) in _games.items():
+            _spill(app, game_id, game, version)
+
+
+def current_game_id():
+    # This session's game id, from session_state or the page URL; a new one
+    # is created (and put in both) on a first visit
+    game_id = st.session_state.get("game_id") or st.query_params.get("game")
+    if not game_id or not all(c in "0123456789abcdef" for c in game_id):
+        game_id = uuid.uuid4().hex
+    st.session_state.game_id = game_id
+    if st.query_params.get("game") != game_id:
+        st.query_params["game"] = game_id
+    return game_id
+
+
+def current_game(script, template=None, scenario=None):
+    # Returns this session's game dict, creating it from `template` on the
+    # first visit. Mutate it in place; no write-back is needed. Fragments
+    # call it without a template to fetch (and keep alive) the same game.
+    # The version of `scenario`, the variant the page plays, is saved with
+    # the game; it is fixed once the first year is played, so later changes
+    # (e.g. 17app's thermal toggle) do not relabel the years already played.
+    _start_sweeper()
+    app = os.path.splitext(os.path.basename(script))[0]
+    if template is not None:
+        _templates[app] = template
+
+    game_id = current_game_id()
+    now = time.time()
+    with _lock:
+        entry = _games.get((app, game_id))
+        if entry is None:
+            game, version = _rehydrate(app, game_id)
+            if game is None:
+                game = copy.deepcopy(_templates[app])
+            entry = _games[(app, game_id)] = [now, game, version]
+        entry[0] = now
+        if scenario is not None and not entry[1]["Year"]:
+            entry[2] = scenario.version
+        resident = len(_games)
+    metrics.set_gauge("game_resident_games", resident)
+    return entry[1]
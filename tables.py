@@ -0,0 +1,122 @@
+import glob
+import os
+import shutil
+import threading
+from itertools import combinations
+from math import comb
+
+import numpy as np
+
+import synergy
+
+# ------------------------------
+# 🗄️ Shared Precomputed Tables
+# ------------------------------
+# Per-scenario tables (every yearly selection, the cost/reduction frontier,
+# the best plan per horizon) are built once and saved as .npy files under
+#
+#   GAME_TABLE_DIR/<scenario id>/<scenario version>/<table>-v<FORMAT>.npy
+#
+# (GAME_TABLE_DIR defaults to GAME_STATE_DIR/tables). Every server process
+# memory-maps them read-only, so the OS page cache holds one copy however
+# many workers run, and a worker started later finds them ready. A new
+# scenario version gets new files; old versions stay until prune().
+# `python planner.py <scenario id> --tables` builds them ahead of time.
+# Catalogs with more than MAX_SELECTIONS yearly selections (e.g. 250
+# initiatives, three a year: 2.6M) get no tables; see fits().
+
+TABLE_DIR = os.environ.get("GAME_TABLE_DIR", os.path.join(os.environ.get("GAME_STATE_DIR", ".game_state"), "tables"))
+MAX_SELECTIONS = 200_000
+FORMAT = 3  # Bumped when a table's layout or meaning changes, so older files are not read
+
+_lock = threading.Lock()  # Guards _building only
+_building = {}  # (Scenario, table name) -> lock held while that table is built
+_open = {}  # (Scenario, table name) -> read-only memmap
+
+
+def path(scenario, name):
+    return os.path.join(TABLE_DIR, scenario.id, scenario.version, f"{name}-v{FORMAT}.npy")
+
+
+def table(scenario, name, build):
+    # The named table of `scenario`, memory-mapped; `build(scenario)` makes
+    # the array the first time any process asks for it. Each table has its
+    # own lock, so a slow build only holds up threads waiting for that table
+    # (a build may ask for other tables).
+    key = (scenario, name)
+    if key in _open:
+        return _open[key]
+    with _lock:
+        building = _building.setdefault(key, threading.Lock())
+    with building:
+        if key not in _open:
+            target = path(scenario, name)
+            if not os.path.exists(target):
+                array = build(scenario)
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                tmp = f"{target}.{os.getpid()}.tmp"
+                with open(tmp, "wb") as f:
+                    np.save(f, array)
+                os.replace(tmp, target)  # Processes building at once write the same table
+            _open[key] = np.load(target, mmap_mode="r")
+        return _open[key]
+
+
+def prune(scenario):
+    # Remove the tables of this scenario's other versions (experiment
+    # variants of the current version are kept)
+    for directory in glob.glob(os.path.join(TABLE_DIR, scenario.id, "*")):
+        if not os.path.basename(directory).startswith(scenario.version):
+            shutil.rmtree(directory, ignore_errors=True)
+
+
+def selection_count(scenario):
+    n = len(scenario.names)
+    return sum(comb(n, size) for size in range(1, scenario.max_selections + 1))
+
+
+def fits(scenario):
+    return selection_count(scenario) <= MAX_SELECTIONS
+
+
+def selection_dtype(scenario):
+    # "picks" holds the catalog columns of the chosen initiatives
+    # (scenario.names order), padded with -1
+    return np.dtype([("picks", "<i4", (scenario.max_selections,)), ("reduction", "<f8"), ("cost", "<f8")])
+
+
+def names(scenario, picks):
+    return [scenario.names[i] for i in picks if i >= 0]
+
+
+def _build_selections(scenario):
+    # Every non-empty selection of up to max_selections initiatives, with
+    # its reduction (synergies included) and cost, cheapest first
+    if not fits(scenario):
+        raise ValueError(f"{scenario.id}: {selection_count(scenario):,} selections is too many for a table")
+    n, k = len(scenario.names), scenario.max_selections
+    rows = np.zeros(selection_count(scenario), dtype=selection_dtype(scenario))
+    rows["picks"] = -1
+    start = 0
+    for size in range(1, k + 1):
+        chosen = np.array(list(combinations(range(n), size)), dtype="<i4").reshape(-1, size)
+        rows["picks"][start:start + len(chosen), :size] = chosen
+        start += len(chosen)
+    rows["reduction"], rows["cost"] = synergy.evaluate_picks(scenario, rows["picks"])
+    return rows[np.lexsort((-rows["reduction"], rows["cost"]))]
+
+
+def _build_frontier(scenario):
+    # The selections no other selection beats on both cost and reduction
+    rows = selections(scenario)
+    best_so_far = np.maximum.accumulate(rows["reduction"])
+    keep = np.r_[True, rows["reduction"][1:] > best_so_far[:-1]]
+    return np.array(rows[keep])
+
+
+def selections(scenario):
+    return table(scenario, "selections", _build_selections)
+
+
+def frontier(scenario):
+    return table(scenario, "frontier", _build_frontier)
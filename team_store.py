@@ -0,0 +1,201 @@
+import itertools
+import os
+import threading
+import uuid
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+
+import streamlit as st
+
+import metrics
+import session_store
+
+# ------------------------------
+# 👥 Team Play on a Shared Game
+# ------------------------------
+# Everyone who opens the same game URL plays the same game (see
+# session_store). This module makes that safe for a team:
+#
+#   - each game has a version counter, bumped by every confirm, and a
+#     change counter, bumped by every confirm or proposal
+#   - a confirm names the version the player was looking at; if a teammate
+#     confirmed since, it is refused (Conflict) and the page reloads
+#   - changes go into a short per-game feed; once a second session has
+#     opened the game, its sessions poll only the counters every
+#     POLL_SECONDS and rerun when they moved, then show the new feed
+#     entries as toasts (a solo player never polls; a session that was
+#     alone starts polling on its next rerun after a teammate joins)
+#
+# Each game has its own lock, so teams never wait on each other. A team is
+# dropped when session_store spills its game; the next visitor starts a new
+# one (a new epoch), with nothing confirmed since the game was spilled.
+#
+#   GAME_TEAM_POLL  seconds between version checks (default 2)
+
+POLL_SECONDS = float(os.environ.get("GAME_TEAM_POLL", "2"))
+FEED_LENGTH = 50
+
+
+class Conflict(Exception):
+    pass
+
+
+_epochs = itertools.count()
+
+
+@dataclass
+class Team:
+    lock: threading.Lock = field(default_factory=threading.Lock)
+    epoch: int = field(default_factory=lambda: next(_epochs))
+    version: int = 0  # Confirms
+    changes: int = 0  # Confirms and proposals
+    feed: deque = field(default_factory=lambda: deque(maxlen=FEED_LENGTH))  # (changes, message)
+    proposals: dict = field(default_factory=dict)  # year -> (member, initiatives)
+    sessions: set = field(default_factory=set)  # Sessions that opened the game
+
+
+_lock = threading.Lock()
+_teams = {}  # (app, game id) -> Team
+
+
+def _key(script):
+    return os.path.splitext(os.path.basename(script))[0], st.session_state.game_id
+
+
+def _team(script):
+    key = _key(script)
+    team = _teams.get(key)
+    if team is None:
+        with _lock:
+            team = _teams.setdefault(key, Team())
+            count = len(_teams)
+        metrics.set_gauge("game_teams", count)
+    return team
+
+
+def _forget(app, game_id):
+    with _lock:
+        _teams.pop((app, game_id), None)
+        count = len(_teams)
+    metrics.set_gauge("game_teams", count)
+
+
+session_store.on_spill(_forget)
+
+
+def _stamp(team):
+    # What a session has seen, kept in st.session_state.team_seen
+    return team.epoch, team.version, team.changes
+
+
+def _up_to_date(team, seen):
+    # Nobody confirmed since the session's page was drawn. A team started
+    # after the game was spilled has no confirms yet, so an older page
+    # still shows the current game.
+    if seen is None:
+        return False
+    if seen[0] != team.epoch:
+        return team.version == 0
+    return seen[1] == team.version
+
+
+def _publish(team, message, confirmed=False):
+    # Caller holds team.lock
+    team.changes += 1
+    if confirmed:
+        team.version += 1
+    team.feed.append((team.changes, message))
+
+
+def member():
+    return st.session_state.get("player_name") or "A teammate"
+
+
+def follow(script):
+    # Call once per full rerun, after session_store.current_game(): shows
+    # what teammates did since this session last looked, records the version
+    # now on screen, and, once a second session has opened the game, keeps
+    # polling for the next change.
+    team = _team(script)
+    seen = st.session_state.get("team_seen")
+    stamp = _stamp(team)
+    if seen is not None and seen[0] == team.epoch and seen[2] != stamp[2]:
+        for changes, message in list(team.feed):
+            if seen[2] < changes <= stamp[2]:
+                st.toast(message, icon="👥")
+    st.session_state.team_seen = stamp
+    with team.lock:
+        team.sessions.add(st.session_state.setdefault("team_session", uuid.uuid4().hex))
+        shared = len(team.sessions) > 1
+
+    st.sidebar.subheader("👥 Team")
+    st.sidebar.text_input("Your name", key="player_name")
+    st.sidebar.caption("Share this page's URL with your team to play the same game together.")
+    if shared:
+        _watch(script)
+
+
+@st.fragment(run_every=POLL_SECONDS)
+def _watch(script):
+    # A spilled game has no team until someone plays it again; polling does
+    # not bring it back
+    team = _teams.get(_key(script))
+    if team is not None and _stamp(team) != st.session_state.get("team_seen"):
+        st.rerun()
+
+
+def propose(script, year, initiatives):
+    # Proposals do not bump the version, so they never make a teammate's
+    # confirm conflict
+    team = _team(script)
+    with team.lock:
+        team.proposals[year] = (member(), list(initiatives))
+        _publish(team, f"{member()} proposes for Year {year}: {', '.join(initiatives)}")
+        seen = st.session_state.get("team_seen")
+        if seen is not None and seen[0] == team.epoch:
+            st.session_state.team_seen = (team.epoch, seen[1], team.changes)  # No toast for one's own proposal
+
+
+def show_proposal(script, year):
+    # The latest teammate proposal for `year`, with a button that copies it
+    # into this year's multiselect (key "initiatives_<year>")
+    proposed = _team(script).proposals.get(year)
+    if proposed:
+        who, initiatives = proposed
+        st.caption(f"💡 {who} proposes: {', '.join(initiatives)}")
+        st.button("Use this proposal", key=f"use_proposal_{year}", on_click=_use_proposal, args=(year, initiatives))
+
+
+def _use_proposal(year, initiatives):
+    st.session_state[f"initiatives_{year}"] = list(initiatives)
+
+
+def propose_button(script, year, initiatives):
+    if st.button("Propose to team", key=f"propose_{year}", disabled=not initiatives):
+        propose(script, year, initiatives)
+        st.rerun()
+
+
+@contextmanager
+def confirming(script, message):
+    # Yields the shared game for an in-place update, holding the team's
+    # lock. Raises Conflict if a teammate confirmed since this session's
+    # page was drawn. The version is bumped only if a year's row changed,
+    # also when the block ends in st.rerun().
+    team = _team(script)
+    with team.lock:
+        if not _up_to_date(team, st.session_state.get("team_seen")):
+            raise Conflict()
+        game_data = session_store.current_game(script)
+        before = dict(zip(game_data["Year"], map(tuple, game_data["Chosen Initiatives"])))
+        try:
+            yield game_data
+        finally:
+            after = dict(zip(game_data["Year"], map(tuple, game_data["Chosen Initiatives"])))
+            changed = [year for year in after if before.get(year) != after[year]]
+            if changed:
+                for year in changed:
+                    team.proposals.pop(year, None)
+                _publish(team, f"{member()} confirmed {message}", confirmed=True)
+                st.session_state.team_seen = _stamp(team)
@@ -0,0 +1,160 @@
+import dataclasses
+from dataclasses import dataclass
+from functools import lru_cache
+from types import MappingProxyType
+
+import numpy as np
+
+# ------------------------------
+# 🌡️ Hourly Building Thermal Model
+# ------------------------------
+# A one-node (1R1C) building over a synthetic 8760-hour year: the indoor
+# temperature follows
+#
+#   T[t] = min(a[t] * T[t-1] + b[t], setpoint)
+#
+# where a[t] holds the losses through the envelope and ventilation and b[t]
+# the outdoor, solar and internal gains; whatever would push T above the
+# setpoint is removed by cooling. Maps x -> min(A x + B, C) stay in that
+# form when composed, so the whole year is a prefix scan: log2(8760) = 14
+# NumPy steps over the (variants, hours) arrays instead of a loop over
+# hours, and every building variant is solved in the same arrays.
+#
+# Scenarios describe retrofits with "thermal", e.g.
+#
+#   "thermal": {"PCM Integrated Roof Coating": {"scale": {"roof_absorptance": 0.6}}}
+#
+# ("scale" multiplies Building fields, "add" adds to them). apply() swaps
+# the fixed impacts of those initiatives for the cooling-load reduction each
+# one gives alone, relative to the unretrofitted building.
+
+HOURS = 8760
+DT = 3600.0  # Seconds per step
+R_SURFACE = 0.04  # Outside surface resistance, m²K/W (roof sol-air gain)
+
+
+@dataclass(frozen=True)
+class Building:
+    name: str = "office"
+    wall_area: float = 1500.0  # m²
+    wall_u: float = 1.5  # W/m²K, uninsulated masonry
+    roof_area: float = 1000.0
+    roof_u: float = 0.5
+    roof_absorptance: float = 0.8
+    window_solar: float = 60.0  # m² of window x solar heat gain coefficient
+    ventilation: float = 300.0  # W/K
+    night_ventilation: float = 0.0  # W/K of extra airflow at night when it is cooler outside
+    capacitance: float = 1.5e8  # J/K of thermal mass
+    internal_gains: float = 10000.0  # W during working hours
+    setpoint: float = 24.0  # °C
+    # Climate (hot, with little winter)
+    mean_temp: float = 27.0
+    seasonal_swing: float = 5.0
+    daily_swing: float = 6.0
+    peak_irradiance: float = 850.0  # W/m²
+
+
+DEFAULT_BUILDING = Building()
+
+
+@lru_cache(maxsize=8)
+def _climate(building):
+    # (outdoor temperature, horizontal irradiance, hour of day), hourly
+    hour = np.arange(HOURS)
+    hour_of_day = hour % 24
+    day = hour // 24
+    season = -np.cos(2 * np.pi * (day - 15) / 365)  # Coldest mid-January
+    outdoor = building.mean_temp + building.seasonal_swing * season + building.daily_swing * np.cos(2 * np.pi * (hour_of_day - 15) / 24)
+    sun = np.clip(np.sin(np.pi * (hour_of_day - 6) / 12), 0, None)
+    irradiance = building.peak_irradiance * sun * (0.75 + 0.25 * season)
+    return outdoor, irradiance, hour_of_day
+
+
+def _column(variants, field):
+    return np.array([getattr(variant, field) for variant in variants], dtype=float)[:, None]
+
+
+def cooling_loads(variants):
+    # Yearly cooling energy (kWh) of each Building in `variants`; the
+    # variants share the climate of the first one
+    outdoor, irradiance, hour_of_day = _climate(variants[0])
+    night = ((hour_of_day >= 22) | (hour_of_day < 6))[None, :]
+    capacitance = _column(variants, "capacitance")
+    setpoint = _column(variants, "setpoint")
+
+    conductance = _column(variants, "wall_area") * _column(variants, "wall_u") + _column(variants, "roof_area") * _column(variants, "roof_u") + _column(variants, "ventilation")
+    free_cooling = _column(variants, "night_ventilation") * (night & (outdoor < setpoint))
+    conductance = conductance + free_cooling
+    gains = (
+        _column(variants, "roof_absorptance") * irradiance * _column(variants, "roof_area") * _column(variants, "roof_u") * R_SURFACE
+        + _column(variants, "window_solar") * irradiance
+        + _column(variants, "internal_gains") * ((hour_of_day >= 8) & (hour_of_day < 18))
+    )
+    a = 1 - DT * conductance / capacitance
+    if (a <= 0).any():
+        raise ValueError("Thermal mass too small for hourly steps")
+    b = DT * (conductance * outdoor + gains) / capacitance
+
+    # Inclusive scan of x -> min(A x + B, C), earliest hour applied first
+    A, B, C = a.copy(), b.copy(), np.broadcast_to(setpoint, a.shape).copy()
+    shift = 1
+    while shift < HOURS:
+        A_prev, B_prev, C_prev = A[:, :-shift], B[:, :-shift], C[:, :-shift]
+        A_now, B_now, C_now = A[:, shift:], B[:, shift:], C[:, shift:]
+        C[:, shift:] = np.minimum(A_now * C_prev + B_now, C_now)
+        B[:, shift:] = A_now * B_prev + B_now
+        A[:, shift:] = A_now * A_prev
+        shift *= 2
+    indoor = np.minimum(A * setpoint + B, C)  # Starts the year at the setpoint
+
+    before = np.concatenate([setpoint, indoor[:, :-1]], axis=1)
+    excess = np.clip(a * before + b - setpoint, 0, None)  # K removed by cooling each hour
+    return (excess * capacitance).sum(axis=1) / 3.6e6
+
+
+def retrofit(building, retrofits):
+    # `building` with the changes of each retrofit applied; a retrofit is
+    # (scale, add), each a tuple of (Building field, number)
+    changes = {}
+    for scale, add in retrofits:
+        for field, factor in scale:
+            changes[field] = changes.get(field, getattr(building, field)) * factor
+        for field, amount in add:
+            changes[field] = changes.get(field, getattr(building, field)) + amount
+    return dataclasses.replace(building, **changes)
+
+
+@lru_cache(maxsize=256)
+def reductions(building, retrofit_sets):
+    # Cooling-load reduction (%) of each retrofit set (a tuple of
+    # retrofits) against `building`
+    loads = cooling_loads([building] + [retrofit(building, retrofits) for retrofits in retrofit_sets])
+    return tuple(float(100 * (1 - load / loads[0])) for load in loads[1:])
+
+
+@lru_cache(maxsize=64)
+def _derived(scenario, building):
+    names = [name for name, _, _ in scenario.thermal]
+    effects = reductions(building, tuple(((scale, add),) for _, scale, add in scenario.thermal))
+    initiatives = dict(scenario.initiatives)
+    for name, effect in zip(names, effects):
+        initiatives[name] = MappingProxyType({**initiatives[name], scenario.metric: round(effect, 1)})
+    return dataclasses.replace(
+        scenario,
+        version=f"{scenario.version}~thermal={building.name}",
+        initiatives=MappingProxyType(initiatives),
+    )
+
+
+def apply(scenario, building=DEFAULT_BUILDING):
+    # `scenario` with its "thermal" initiatives derived from the model
+    if not scenario.thermal:
+        return scenario
+    return _derived(scenario, building)
+
+
+def reapply(scenario, name):
+    # The variant a "~thermal=<building>" version tag names (see reports.py)
+    if not scenario.thermal or name != DEFAULT_BUILDING.name:
+        raise ValueError(f"no thermal model of building {name} for {scenario.id}")
+    return _derived(scenario, DEFAULT_BUILDING)
@@ -0,0 +1,39 @@
+import streamlit as st
+
+# ------------------------------
+# 📅 Paged Year View
+# ------------------------------
+# In paged mode only the next undecided year gets a subheader, multiselect
+# and button; the confirmed years collapse into one summary line. The page
+# then holds the same handful of elements whatever the horizon. Paging is
+# off unless the player turns it on, since confirmed years are not shown
+# for revision.
+
+
+def _summary(game_data, scenario):
+    number = {name: f"#{i}" for i, name in enumerate(scenario.names, start=1)}
+    parts = [
+        # A name no longer in the catalog (renamed in a live edit) is shown as is
+        f"Year {year}: " + ", ".join(number.get(name, name) for name in chosen) + f" (${cost}M)"
+        for year, chosen, cost in zip(game_data["Year"], game_data["Chosen Initiatives"], game_data["Total Cost"])
+    ]
+    return "✅ " + " · ".join(parts)
+
+
+def years_to_render(years, game_data, scenario):
+    paged = st.sidebar.toggle(
+        "Show one year at a time",
+        value=False,
+        key="paged_years",
+        help="Confirmed years collapse into one line and can no longer be revised.",
+    )
+    if not paged:
+        return range(1, years + 1)
+
+    confirmed = set(game_data["Year"])
+    if confirmed:
+        st.caption(_summary(game_data, scenario))
+    pending = [year for year in range(1, years + 1) if year not in confirmed]
+    if not pending:
+        st.info(f"All {years} years are decided. See the results below.")
+    return pending[:1]